@@ -15,19 +15,14 @@ import os
 import sys
 import time
 
-# Add the path of the flatland package
-sys.path.insert(0, os.path.abspath('../flatland'))
-
-print("---------------------------------------------------------------------")
-print("\n".join(sys.path))
-print("---------------------------------------------------------------------")
-print()
-
-from trace import logger
-from shapes import Circle, SeqPolygon
-from flatland import FlatLand
-import geom_utils as geom
-from virtual_sensor import VirtualSensor, load_measures
+# Add the path of the repository root so the flatland package resolves
+sys.path.insert(0, os.path.abspath('..'))
+
+from flatland.trace import logger
+from flatland.shapes import Circle, SeqPolygon
+from flatland.flatland import FlatLand
+from flatland import geom_utils as geom
+from flatland.virtual_sensor import VirtualSensor, load_measures
 import numpy as np
 
 
@@ -72,7 +67,7 @@ S1.set_color("k")
 S1.place((0.0, 0.0), 0)
 
 # Make aware the sensor of the external environment
-S1.load_env(desk_bench.venv)
+S1.load_env(desk_bench.venv_points)
 
 # Add sensor to the virtual environment
 desk_bench.add_sensors(S1)
@@ -85,17 +80,24 @@ logger.info("Num. scan points= {}".format(len(scan_points)))
 # Scan points are in polar coordinates in the sensor reference system,
 # Get the range measurements related to the Flatland environment.
 
-# Transform point in rectangular coordinates
-rect_points = [geom.pol2cart(ppol[0], np.deg2rad(ppol[1])) for ppol in scan_points if ppol[0] != 0.0]
+# Transform points in rectangular coordinates all at once: the scan is
+# already an (N, 2) array, so drop out-of-range (zero rho) readings with
+# a mask and convert with array operations instead of one pol2cart call
+# per point
+valid = scan_points[:, 0] != 0.0
+rho = scan_points[valid, 0]
+theta = np.deg2rad(scan_points[valid, 1])
+rect_points = np.column_stack((rho*np.cos(theta), rho*np.sin(theta)))
 logger.info("Num valid points= {}".format(len(rect_points)))
 
 # Transform the points as seen from the coordinate system external to the sensor,
 # given sensor position and orientation in the external coordinate system.
+# The whole scan goes through the batched kernel in one call
 xo, yo = S1.position
 alpha = S1.orientation # radiant
 sensor_sys = (xo, yo, alpha, True)
 
-meas_points = [geom.localpos_to_globalpos(rpoint, sensor_sys) for rpoint in rect_points]
+meas_points = geom.batch_localpos_to_globalpos(rect_points, sensor_sys)
 
 # The measured points are related to the external coordinate system.
 
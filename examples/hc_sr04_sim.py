@@ -16,18 +16,17 @@ since it was designed for such cases.
 import os
 import sys
 
-# Add the path of the flatland package
-sys.path.insert(0, os.path.abspath('../flatland'))
+# Add the path of the repository root so the flatland package resolves
+sys.path.insert(0, os.path.abspath('..'))
 
 
-from trace import logger
-import copy
+from flatland.trace import logger
 
-from shape import Shape
-import shapes
-from flatland import FlatLand
-import geom_utils as geom
-from virtual_sensor import VirtualSensor
+from flatland.shape import Shape
+from flatland import shapes
+from flatland.flatland import FlatLand
+from flatland import geom_utils as geom
+from flatland.virtual_sensor import VirtualSensor
 import numpy as np
 
 
@@ -45,20 +44,16 @@ logger.info("Room points= {}".format(room.size()))
 def chair_constructor():
     """Footprint of a four legged classic chair"""
     leg_side = 5 # cm
-    leg1 = shapes.Circle(leg_side)
-    leg1.color("r")
-    leg2 = shapes.Circle(leg_side)
-    leg2.traslate(30, 0)
-    leg2.color("r")
-    leg3 = shapes.Circle(leg_side)
-    leg3.traslate(30, 40)
-    leg3.color("k")
-    leg4 = shapes.Circle(leg_side)
-    leg4.traslate(0,40)
-    leg4.color("r")
-
-    legs = [leg1, leg2, leg3, leg4]
-    chair = shapes.CompoundShape(legs, "chair")
+
+    # Build a single template leg and place all four legs with one
+    # broadcasted add of the leg offsets
+    base_leg = shapes.Circle(leg_side).get_points()
+    offsets = np.array([[0, 0], [30, 0], [30, 40], [0, 40]])
+    legs_points = (offsets[:, None, :] + base_leg[None, :, :]).reshape(-1, 2)
+
+    chair = shapes.CompoundShape(name="chair")
+    chair.add_points(legs_points)
+    chair.reset()
     return chair
 
 # Create and pose the chair into the room
@@ -73,7 +68,7 @@ logger.info("Bench points= {}".format(sim_env.size()))
 # Define an configure two sensors
 # S1 - HC-SR04
 S1 = VirtualSensor(name="HC-SR04_01", beam=30, range=50, accuracy=2, mnt_pt=(0, 0), mnt_orient=90)
-S1.load_env(sim_env.venv)
+S1.load_env(sim_env.venv_points)
 S1.place((175, 300), 45)
 
 # S2 - HC-SR04
@@ -82,7 +77,7 @@ S2.set_color("y")
 
 # Supply virtual environment to sensors
 # Loaded from S2 the same environment will be available for all other sensors
-S2.load_env(sim_env.venv)
+S2.load_env(sim_env.venv_points)
 
 # Add sensors to the virtual environment
 sim_env.add_sensors(S1, S2)
@@ -122,10 +117,19 @@ S2.place((S2_sys[0], S2_sys[1]), S2_sys[2])
 S2.plot_surroundings()
 scan_points = S2.scan(-90, 90)
 
-# Transform detected points in rectangular coordinates
-scan_meas = [geom.pol2cart(ppoint[0], np.deg2rad(ppoint[1])) for ppoint in scan_points]
-# Calculate points in the esternal sysref
-ext_scan_meas = [geom.localpos_to_globalpos(meas_point, S2_sys) for meas_point in scan_meas]
+# Transform detected points in rectangular coordinates in one shot: the
+# scan is already an (N, 2) array, so convert it with array operations
+# instead of one pol2cart call per point.
+# Drop out-of-range (zero rho) readings with a boolean mask instead of
+# testing each reading in Python
+valid = scan_points[:, 0] != 0.0
+rho = scan_points[valid, 0]
+theta = np.deg2rad(scan_points[valid, 1])
+scan_meas = np.column_stack((rho*np.cos(theta), rho*np.sin(theta)))
+
+# Calculate points in the esternal sysref; the whole scan goes through
+# the batched kernel in one call
+ext_scan_meas = geom.batch_localpos_to_globalpos(scan_meas, S2_sys)
 
 geom.plot(ext_scan_meas)
 
@@ -16,21 +16,21 @@ import os
 import sys
 import time
 
-# Add the path of the flatland package
-sys.path.insert(0, os.path.abspath('../flatland'))
+# Add the path of the repository root so the flatland package resolves
+sys.path.insert(0, os.path.abspath('..'))
 
 
-from trace import logger
+from flatland.trace import logger
 logger.add("navigation_sim.log", mode="w")
 
-import copy
 
-import shapes
-from flatland import FlatLand
-from chassis_shape import ChassisShape
-from virtual_vehicle import VirtualVehicle
-import geom_utils as geom
-from geom_utils import Point
+import numpy as np
+from flatland import shapes
+from flatland.flatland import FlatLand
+from flatland.chassis_shape import ChassisShape
+from flatland.virtual_vehicle import VirtualVehicle
+from flatland import geom_utils as geom
+from flatland.geom_utils import Point
 
 # Compose the simulated environment
 # The room
@@ -47,23 +47,30 @@ logger.info("Room points= {}".format(room.size()))
 pillar = shapes.Square(50)
 pillar.traslate(100, 100)
 
+# Template leg footprints cached at module level: chairs and tables are
+# built more than once with the same leg sizes and rebuilding a
+# Circle/Square point array each time repeats the same trig work
+_leg_templates = {}
+
+def _leg_template(shape_cls, size):
+    """Return (building it once) the point array of a template leg"""
+    key = (shape_cls.__name__, size)
+    if key not in _leg_templates:
+        _leg_templates[key] = shape_cls(size).get_points()
+    return _leg_templates[key]
+
 # The chair composition
 def chair_constructor(side, leg_side, name):
     """Footprint of a four legged classic chair"""
-    leg1 = shapes.Circle(leg_side)
-    leg1.color("r")
-    leg2 = shapes.Circle(leg_side)
-    leg2.traslate(side, 0)
-    leg2.color("r")
-    leg3 = shapes.Circle(leg_side)
-    leg3.traslate(side, side)
-    leg3.color("k")
-    leg4 = shapes.Circle(leg_side)
-    leg4.traslate(0,side)
-    leg4.color("r")
-
-    legs = [leg1, leg2, leg3, leg4]
-    chair = shapes.CompoundShape(legs, name)
+    # Build a single template leg and place all four legs with one
+    # broadcasted add of the leg offsets
+    base_leg = _leg_template(shapes.Circle, leg_side)
+    offsets = np.array([[0, 0], [side, 0], [side, side], [0, side]])
+    legs_points = (offsets[:, None, :] + base_leg[None, :, :]).reshape(-1, 2)
+
+    chair = shapes.CompoundShape(name=name)
+    chair.add_points(legs_points)
+    chair.reset()
     return chair
 
 # Create and pose the chair into the room
@@ -77,20 +84,14 @@ chair2.traslate(250, 50)
 # A table
 def table_constructor(side1, side2, leg_side, name):
     """Footprint of a table"""
-    leg1 = shapes.Square(leg_side)
-    leg1.color("r")
-    leg2 = shapes.Square(leg_side)
-    leg2.traslate(side1, 0)
-    leg2.color("r")
-    leg3 = shapes.Square(leg_side)
-    leg3.traslate(side1, side2)
-    leg3.color("k")
-    leg4 = shapes.Square(leg_side)
-    leg4.traslate(0, side2)
-    leg4.color("r")
-
-    legs = [leg1, leg2, leg3, leg4]
-    table = shapes.CompoundShape(legs, name)
+    # Same template-leg pattern used for the chair
+    base_leg = _leg_template(shapes.Square, leg_side)
+    offsets = np.array([[0, 0], [side1, 0], [side1, side2], [0, side2]])
+    legs_points = (offsets[:, None, :] + base_leg[None, :, :]).reshape(-1, 2)
+
+    table = shapes.CompoundShape(name=name)
+    table.add_points(legs_points)
+    table.reset()
     return table
 
 
@@ -147,21 +148,25 @@ def simulator():
                 ("trn", 90), ("mv", 10), ("trn", 120), ("scan", 1),
                 ("trn", -180), ("mv", 20),
                 ]
-    for action in actions:
-        act, val = action
-        if act == "mv":
-            twv.move(val)
-        elif act == "trn":
-            twv.turn(val)
-        elif act == "scan":
-            scan_data = twv.scan("all", angle_step=val)
-            map_data = twv.scan_to_map(scan_data)
-            # Plot scan of each sensor
-            for sensor_id in map_data:
-                #logger.debug("Map data {}: {}".format(sensor_id, map_data[sensor_id]))
-                geom.plot(map_data[sensor_id])
-        else:
+    def scan_action(angle_step):
+        """Scan all sensors and collect the mapped points of each one"""
+        scan_data = twv.scan("all", angle_step=angle_step)
+        map_data = twv.scan_to_map(scan_data)
+        # Accumulate the scans; the environment draws them in one batch
+        for sensor_id in map_data:
+            #logger.debug("Map data {}: {}".format(sensor_id, map_data[sensor_id]))
+            sim_env.add_scan_points(map_data[sensor_id])
+
+    # Dispatch table: one lookup per action instead of a chain of string
+    # compares at every step
+    action_table = {"mv": twv.move, "trn": twv.turn, "scan": scan_action}
+
+    for act, val in actions:
+        action = action_table.get(act)
+        if action is None:
             print("Unknown move {}".format(act))
+            continue
+        action(val)
 
         # Trace the last position on the vehicle
         twv.plot_path()
@@ -7,14 +7,14 @@ Vehicle spatial information
 """
 
 # Imports
-from trace import logger
+from .trace import logger
 logger.add("vehicle.log", mode="w")
 
-import shapes
+from . import shapes
 import numpy as np
 
 # Project imports
-import geom_utils as geom
+from . import geom_utils as geom
 
     
 class ChassisShape(shapes.Rectangle):
@@ -49,17 +49,19 @@ class ChassisShape(shapes.Rectangle):
         self.base = base
         self.height = height
 
-        # Add second side
+        # Add second side in a single allocation instead of one append
+        # per point
         xside = base - gap
-        yords = np.arange(0.0, height, res)
-        for y in yords:
-            self.points.append((xside, y))
+        yords = np.linspace(0.0, height, int(round(height / res)),
+                            endpoint=False)
+        side_pts = np.column_stack((np.full(yords.shape, xside), yords))
+        self.add_points(side_pts)
+        self.reset()
 
-        # Traslate rectangle in order to be centered to the origin
-        self.traslate(-base/2, -height/2)
-        
-        # Traslate in order to position the track axle
-        self.traslate(-base/4, 0)
+        # Traslate rectangle in order to be centered to the origin and
+        # to position the track axle: both offsets collapse into one
+        # in-place pass over the point array
+        self.traslate(-base/2 - base/4, -height/2)
         self.save()   # Save actual point configuration as
         self.reset()
         
@@ -71,10 +73,12 @@ class ChassisShape(shapes.Rectangle):
         self.y_min = -height/2
         self.y_max = height/2
         
-        # Calculate the radius of the circumference circumscribed to the vehicle
-        shape_polar_pts = geom.to_polar(self.shape_points)
-        rhos = [rho for rho, phi in shape_polar_pts]
-        self.safe_radius = np.max(rhos)
+        # Calculate the radius of the circumference circumscribed to the
+        # vehicle; only the module of each point is needed, so a single
+        # norm reduction over the point array avoids the full polar
+        # conversion
+        self.safe_radius = float(np.linalg.norm(self.shape_points,
+                                                axis=1).max())
 
     def outer_radius(self):
         """Return the radius of the circumference circumscribed to the vehicle"""
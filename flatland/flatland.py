@@ -10,10 +10,12 @@ Sensors can be moved and rotated into the land acquiring _dynamic_ range
 measures that can be used to compose a map or to test a navigation algorithm
 """
 
-from trace import logger
+from .trace import logger
 logger.debug("FlatLand")
 
-import geom_utils as geom
+import numpy as np
+
+from . import geom_utils as geom
 
 
 class FlatLand():
@@ -29,13 +31,26 @@ class FlatLand():
         self.venv = []  # The virtual environment is a list of compounds
         self.sensors = dict() # Sensor dictionary
 
+        # All object footprints batched into one contiguous (N, 2) array;
+        # sensors can sweep it with single array operations instead of
+        # iterating the objects
+        self.venv_points = np.empty((0, 2))
+
+        # Scan points accumulated during a simulation; they are drawn
+        # batched in a single artist at plot time
+        self.scan_points = []
+
     def add_objects(self, *objects):
         """
-        Append a shape or a compound to the object list
+        Append a shape or a compound to the object list and rebuild the
+        batched footprint array
         """
         for obj in objects:
             self.venv.append(obj)
 
+        self.venv_points = np.vstack([np.asarray(obj.get_points())
+                                      for obj in self.venv])
+
     def add_sensors(self, *sensors):
         """
         Append a sensor to the sensor list
@@ -45,18 +60,43 @@ class FlatLand():
                 logger.warning("the sensor '{}' will be replaced".format(sensor.name))
             self.sensors[sensor.name] = sensor
 
+    def add_scan_points(self, points):
+        """
+        Accumulate a batch of scan points (any (N, 2) array-like) to be
+        drawn at the next plot.
+
+        Collecting the batches and drawing them all at once costs a
+        single matplotlib artist instead of one per scan
+        """
+        pts = np.asarray(points).reshape(-1, 2)
+        if pts.size > 0:
+            self.scan_points.append(pts)
+
     def plot(self):
         """
-        Plot the actual flatland configuration
+        Plot the actual flatland configuration.
+
+        Objects sharing the same pen trait and color are concatenated
+        and drawn with a single matplotlib call: artist creation is the
+        dominant plotting cost when the environment holds many objects
         """
-        # Plot objects
+        # Plot objects, batched per (trait, color) pen group
+        pen_groups = {}
         for obj in self.venv:
-            obj.plot()
+            pen = (obj.pen_trait, obj.pen_color)
+            pen_groups.setdefault(pen, []).append(obj.get_points())
+
+        for (pen_trait, pen_color), points in pen_groups.items():
+            geom.plot(np.concatenate(points), pen_trait, pen_color)
 
         # Plot sensors
         for sensor in self.sensors:
             self.sensors[sensor].plot()
 
+        # Plot all accumulated scan points in one call
+        if self.scan_points:
+            geom.plot(np.concatenate(self.scan_points))
+
     def show(self, live: bool=False):
         """
         Shows the current plot.
@@ -10,7 +10,8 @@ Module with utility function for manipulation points in various coordinate syste
 """
 
 # General imports
-from trace import logger
+from .trace import logger
+import math
 import numpy as np
 import matplotlib.pyplot as plt
 from collections import namedtuple
@@ -18,6 +19,73 @@ from collections import namedtuple
 # Point definition
 Point = namedtuple("Point", ["x", "y"])
 
+# Floating point dtype used for every point array built by this module
+# and by the shapes. float64 is the default so the sensing numerics are
+# unchanged; workloads bound by memory bandwidth whose points only end
+# up on screen can set it to np.float32 and halve the bytes moved by
+# every transform
+DEFAULT_DTYPE = np.float64
+
+# Memoization of the (cos, sin) pair of an angle.
+# Transform helpers are typically invoked many times with the same angle
+# (e.g. every shape of a compound moved by the same rotation), so the
+# degree conversion and the two transcendental calls are paid only once
+# per distinct angle
+_TRIG_CACHE = {}
+_TRIG_CACHE_MAX = 128
+
+# Exact (cos, sin) pairs of the four quadrant angles, indexed by the
+# number of quarter turns. Using them instead of the trig calls keeps
+# repeated right-angle rotations free of rounding drift
+_QUADRANT_CS = ((1.0, 0.0), (0.0, 1.0), (-1.0, 0.0), (0.0, -1.0))
+
+def _cs(angle: float, rad: bool):
+    """Return the (cos, sin) pair of 'angle', caching the result.
+
+    Angles that are integer multiples of 90 degrees (or pi/2 radiants)
+    take an exact table lookup instead of the trig calls
+    """
+    key = (angle, rad)
+    cs = _TRIG_CACHE.get(key)
+    if cs is None:
+        if rad:
+            quarters = angle / (math.pi / 2)
+        else:
+            quarters = angle / 90.0
+        kq = round(quarters)
+        if abs(quarters - kq) < 1e-12:
+            cs = _QUADRANT_CS[int(kq) & 3]
+        else:
+            alpha = angle if rad else math.radians(angle)
+            cs = (math.cos(alpha), math.sin(alpha))
+        if len(_TRIG_CACHE) >= _TRIG_CACHE_MAX:
+            _TRIG_CACHE.clear()
+        _TRIG_CACHE[key] = cs
+    return cs
+
+# Built 2x2 rotation matrices, cached like the (cos, sin) pairs:
+# chassis movements repeat identical deltas across every sensor and
+# shape, so the matrix build is usually paid once per distinct angle
+_ROTMAT_CACHE = {}
+
+def rotation_matrix(angle: float, rad: bool = False):
+    """Return the 2x2 rotation matrix of 'angle', caching the result.
+
+    The returned array is read-only because it is shared among all
+    callers; apply it with 'points @ mat.T' or copy it before any
+    in-place use
+    """
+    key = (angle, rad)
+    mat = _ROTMAT_CACHE.get(key)
+    if mat is None:
+        cos_a, sin_a = _cs(angle, rad)
+        mat = np.array([[cos_a, -sin_a], [sin_a, cos_a]])
+        mat.flags.writeable = False
+        if len(_ROTMAT_CACHE) >= _TRIG_CACHE_MAX:
+            _ROTMAT_CACHE.clear()
+        _ROTMAT_CACHE[key] = mat
+    return mat
+
 def str_point(point: tuple, precision: int = 1):
     """Return a printed tuple with precision"""
     prec_str = "{:." + str(precision) + "f}"
@@ -26,9 +94,13 @@ def str_point(point: tuple, precision: int = 1):
     return format_str.format(x, y)
 
 def cart2pol(x: float, y: float):
-    """Coordinate conversion fron cartesian (rectangular)to polar"""
-    rho = np.sqrt(x**2 + y**2)
-    phi = np.arctan2(y, x)
+    """Coordinate conversion fron cartesian (rectangular)to polar
+
+    Scalar math calls are used on purpose: numpy ufuncs on 0-d inputs
+    pay dispatcher overhead far bigger than the trig itself
+    """
+    rho = math.hypot(x, y)
+    phi = math.atan2(y, x)
     return (rho, phi)
 
 def rect2polar(rect_pt: tuple, rad: bool = True):
@@ -45,22 +117,25 @@ def rect2polar(rect_pt: tuple, rad: bool = True):
     (rho, phi) tuple with the unit of the angle selected by the flag
     """
     x, y = rect_pt
-    rho, rad_phi = cart2pol()
-    if rad is True:
-        phi = rad_phi
-    else:
-        phi = np.rad2deg(rad_phi)
+    rho = math.hypot(x, y)
+    phi = math.atan2(y, x)
+    if rad is False:
+        phi = math.degrees(phi)
     return (rho, phi)
 
 
 def pol2cart(rho: float, phi: float, rad: bool = True):
-    """Coordinate conversion from polar to cartesian"""
+    """Coordinate conversion from polar to cartesian
+
+    As 'cart2pol', pure scalar math calls avoid the numpy 0-d
+    dispatch overhead
+    """
     if rad:
         phi_rad = phi
     else:
-        phi_rad = np.deg2rad(phi)
-    x = rho*np.cos(phi_rad)
-    y = rho*np.sin(phi_rad)
+        phi_rad = math.radians(phi)
+    x = rho*math.cos(phi_rad)
+    y = rho*math.sin(phi_rad)
     return (x, y)
 
 def polar2rect(polar_pt: tuple, rad: bool = True):
@@ -77,23 +152,34 @@ def polar2rect(polar_pt: tuple, rad: bool = True):
     (x, y) tuple
     """
     rho, phi = polar_pt
-    return pol2cart(rho, phi, rad)
+    if rad is False:
+        phi = math.radians(phi)
+    return (rho*math.cos(phi), rho*math.sin(phi))
 
 
-def to_polar(points: list):
-    """Convert all points (x, y) contained in a list from cartesian coordinates to polar ones"""
-    polar_points = []
-    for point in points:
-        x, y = point
-        polar_points.append(cart2pol(x, y))
-    return polar_points
+def to_polar(points):
+    """Convert all points (x, y) of a sequence from cartesian coordinates to polar ones
+
+    The conversion runs as two batched ufunc calls (hypot and arctan2)
+    over the whole array instead of one Python call per point.
+    Returns an (N, 2) ndarray of (rho, phi) rows
+    """
+    pts = np.asarray(points, dtype=DEFAULT_DTYPE).reshape(-1, 2)
+    rho = np.hypot(pts[:, 0], pts[:, 1])
+    phi = np.arctan2(pts[:, 1], pts[:, 0])
+    return np.stack((rho, phi), axis=1)
 
 def to_rect(points):
-    """Convert all tuple points (rho, phi) contained in a list from polar coordinates into cartesian ones"""
-    cart_points = []
-    for point in points:
-        cart_points.append(pol2cart(*point))
-    return cart_points
+    """Convert all points (rho, phi) of a sequence from polar coordinates into cartesian ones
+
+    As 'to_polar', the conversion is performed with batched cos/sin
+    calls on the whole array.
+    Returns an (N, 2) ndarray of (x, y) rows
+    """
+    pts = np.asarray(points, dtype=DEFAULT_DTYPE).reshape(-1, 2)
+    rho = pts[:, 0]
+    phi = pts[:, 1]
+    return np.stack((rho * np.cos(phi), rho * np.sin(phi)), axis=1)
 
 def segment_length(pt1: tuple, pt2: tuple, coord: str, rad: bool=True):
     """Return the distance between two points
@@ -122,65 +208,74 @@ def segment_length(pt1: tuple, pt2: tuple, coord: str, rad: bool=True):
     else:
         x1, y1 = pt1
         x2, y2 = pt2
-    return np.sqrt((x1 - x2)**2 + (y1 - y2)**2)
+    return math.hypot(x1 - x2, y1 - y2)
+
+def segment_lengths(p1s, p2s, coord: str = "rect", rad: bool = True):
+    """Return the distances between the corresponding points of two
+    sequences.
 
-def rotate(points: list, angle: float, rad: bool = False):
-    """Rotates point in alist
+    Batched counterpart of 'segment_length': the coordinate check and
+    the polar conversion happen once and the distances come out of a
+    single vectorized norm reduction.
+
+    Parameters have the same meaning of 'segment_length' but accept
+    (N, 2) arrays (or sequences of tuples); an (N,) ndarray of
+    distances is returned
+    """
+    assert coord == "rect" or coord == "cart" or coord == "polar", "'coord' values allowed are 'rect', 'cart' or 'polar'"
+    p1s = np.asarray(p1s, dtype=DEFAULT_DTYPE).reshape(-1, 2)
+    p2s = np.asarray(p2s, dtype=DEFAULT_DTYPE).reshape(-1, 2)
+    if coord == "polar":
+        if rad is False:
+            p1s = np.column_stack((p1s[:, 0], np.deg2rad(p1s[:, 1])))
+            p2s = np.column_stack((p2s[:, 0], np.deg2rad(p2s[:, 1])))
+        p1s = to_rect(p1s)
+        p2s = to_rect(p2s)
+    return np.linalg.norm(p1s - p2s, axis=1)
+
+def rotate(points, angle: float, rad: bool = False, out=None):
+    """Rotates a sequence of points around the origin
 
     Default angle unit is degree and wiil be converted to radiant
     before calculations
 
-    Rotation algorithm is simple:
-    - convert points in polar coordinates
-    - add angle to the angle of each point
-    - convert new points in rectangular coordinates
+    The 2x2 rotation matrix is built once and applied to the whole
+    point array with a single matrix product; no per point polar
+    round-trip is needed
 
     Parameters
     ----------
-    points : list
-        list of tuples (x, y)
+    points : sequence of (x, y) tuples or (N, 2) ndarray
     angle : float
         rotation angle
     rad : bool
         flag indicating if angle is expressed in radiant.
         Defaults to False
+    out : np.ndarray
+        optional (N, 2) buffer receiving the result; may be the input
+        array itself for an in-place rotation without allocation
 
     Return
     ------
-    A list of tuples (x, y)
+    An (N, 2) ndarray of rotated points
     """
-    # Polar conversion of the actual (last modification) Shape
-    polar_shape = to_polar(points)
-
-    # Perform rotation
-    if rad is False:
-        alpha = np.deg2rad(angle)
-    else:
-        alpha = angle
+    pts = np.asarray(points, dtype=DEFAULT_DTYPE).reshape(-1, 2)
 
-    rotated_shape = []
-    for rho, phi in polar_shape:
-        rotated_shape.append((rho, phi+alpha))
+    return np.matmul(pts, rotation_matrix(angle, rad).T, out=out)
 
-    # Cartesian conversion
-    return to_rect(rotated_shape)
 
-
-def traslate(points: list, dx: float, dy: float):
-    """Traslate each point of a list of dx and dy length.
+def traslate(points, dx: float, dy: float):
+    """Traslate each point of a sequence of dx and dy length.
 
     It's a differential traslation, not absoluta at point.
     The traslation action will be performed on the actual points of
-    the Shape, that is on the last its transformation
-    """
-    # Perform traslation of the actual (last modification) Shape
-    traslated_points = []
-    for px, py in points:
-        tx = px + dx
-        ty = py + dy
-        traslated_points.append((tx, ty))
+    the Shape, that is on the last its transformation.
 
-    return traslated_points
+    The whole point array is shifted with one broadcasted add; an
+    (N, 2) ndarray is returned
+    """
+    pts = np.asarray(points, dtype=DEFAULT_DTYPE).reshape(-1, 2)
+    return pts + (dx, dy)
 
 
 def plot_segment(p1: tuple, p2: tuple, pen_color: str = "c"):
@@ -209,22 +304,19 @@ def annotate_point(p: tuple, text: str):
     """Put a label at point"""
     plt.annotate(text, p)
 
-def plot(points: list, pen_trait: str = ".", pen_color: str = "k"):
-    """Plot but does not show a list of points in its coordinate system
+def plot(points, pen_trait: str = ".", pen_color: str = "k"):
+    """Plot but does not show a sequence of points in its coordinate system
     Uses mathplotlib.pyplot module capabilities
-    """
-    # Produce coordinate lists
-    xv = []
-    yv = []
 
-    for p in points:
-        x, y = p
-        xv.append(x)
-        yv.append(y)
+    The coordinate columns are passed to matplotlib directly as array
+    slices, avoiding the per point unpacking into Python lists that
+    matplotlib would convert back to arrays anyway
+    """
+    pts = np.asarray(points, dtype=DEFAULT_DTYPE).reshape(-1, 2)
 
     # Plot the current shape
     pen = pen_trait + pen_color
-    plt.plot(xv, yv, pen, linewidth=.5, markersize=.5)
+    plt.plot(pts[:, 0], pts[:, 1], pen, linewidth=.5, markersize=.5)
 
 def live_plot(on: bool):
     if on:
@@ -256,6 +348,29 @@ def close():
 # Calculation of point coordinates in a new coordinate system
 
 
+def affine_matrix(angle: float, tx: float = 0.0, ty: float = 0.0,
+                  rad: bool = False):
+    """Return the 3x3 homogeneous matrix composing a rotation by 'angle'
+    followed by a traslation of (tx, ty).
+
+    Pre-composing the two transforms into one matrix lets callers apply
+    them to a point array in a single pass; the cos/sin pair comes from
+    the shared trig cache
+    """
+    cos_a, sin_a = _cs(angle, rad)
+    return np.array([[cos_a, -sin_a, tx],
+                     [sin_a, cos_a, ty],
+                     [0.0, 0.0, 1.0]])
+
+
+def _local_sys_affine(local_sys: tuple):
+    """Resolve a local_sys tuple (xo, yo, alpha, rad) into its origin
+    and the cached cos/sin of the rotation angle"""
+    xo, yo, alpha, rad = local_sys
+    cos_a, sin_a = _cs(alpha, bool(rad))
+    return xo, yo, cos_a, sin_a
+
+
 def globalpos_to_localpos(point: tuple, local_sys: tuple) -> tuple:
     """
     Calculates the new point's coordinates (xp, yp) in the local coordinate
@@ -277,23 +392,41 @@ def globalpos_to_localpos(point: tuple, local_sys: tuple) -> tuple:
     are always expressed with respect tothe global one
     """
     xp, yp = point
-    xo, yo, alpha, rad = local_sys
+    xo, yo, cos_a, sin_a = _local_sys_affine(local_sys)
+    dx = xp - xo
+    dy = yp - yo
+    return (cos_a*dx - sin_a*dy, sin_a*dx + cos_a*dy)
 
-    if rad is False:
-        alpha_rad = np.deg2rad(alpha)
-    else:
-        alpha_rad = alpha
 
-    xl = np.cos(alpha_rad)*(xp - xo) - np.sin(alpha_rad)*(yp - yo)
-    yl = np.sin(alpha_rad)*(xp - xo) + np.cos(alpha_rad)*(yp - yo)
-
-    return (xl, yl)
+def to_localpos(points, local_sys: tuple, out=None):
+    """
+    Calculates the coordinates in the local coordinate system of a whole
+    sequence of points expressed in the global one.
 
+    The rotation matrix and the translation are resolved once and applied
+    to the stacked point array as a single fused affine transform,
+    instead of re-evaluating deg2rad/cos/sin for every point.
 
-def to_localpos(points: list, local_sys: tuple) -> list:
-    """Utility function to apply 'globalpos_to_localpos' to a list of points"""
+    Parameters
+    ----------
+    points : sequence of (x, y) tuples or (N, 2) ndarray
+    local_sys : tuple
+        (xo, yo, alpha, rad), see 'globalpos_to_localpos'
+    out : (N, 2) ndarray, optional
+        preallocated output buffer; callers in a loop can reuse it to
+        skip one allocation per call. Must not overlap 'points'
 
-    return [globalpos_to_localpos(point, local_sys) for point in points]
+    Return
+    ------
+    (N, 2) ndarray of points in the local coordinate system
+    """
+    pts = np.asarray(points, dtype=DEFAULT_DTYPE).reshape(-1, 2)
+    xo, yo, cos_a, sin_a = _local_sys_affine(local_sys)
+    rot = np.array([[cos_a, -sin_a], [sin_a, cos_a]])
+    if out is None:
+        return (pts - (xo, yo)) @ rot.T
+    np.matmul(pts - (xo, yo), rot.T, out=out)
+    return out
 
 
 def localpos_to_globalpos(point: tuple, local_sys: tuple) -> tuple:
@@ -318,23 +451,46 @@ def localpos_to_globalpos(point: tuple, local_sys: tuple) -> tuple:
     are always expressed with respect to the global one
     """
     xl, yl = point
-    xo, yo, alpha, rad = local_sys
+    xo, yo, cos_a, sin_a = _local_sys_affine(local_sys)
+    return (xo + xl*cos_a - yl*sin_a, yo + xl*sin_a + yl*cos_a)
 
-    if rad is False:
-        alpha_rad = np.deg2rad(alpha)
-    else:
-        alpha_rad = alpha
 
-    xp = xo + xl*np.cos(alpha_rad) - yl*np.sin(alpha_rad)
-    yp = yo + xl*np.sin(alpha_rad) + yl*np.cos(alpha_rad)
+def to_globalpos(points, local_sys: tuple, out=None):
+    """
+    Calculates the coordinates in the global coordinate system of a whole
+    sequence of points expressed in the local one.
 
-    return (xp, yp)
+    As 'to_localpos', the affine transform (2x2 rotation matrix plus
+    translation) is built once and applied to the stacked point array
+    with a single matrix product.
 
+    Parameters
+    ----------
+    points : sequence of (x, y) tuples or (N, 2) ndarray
+    local_sys : tuple
+        (xo, yo, alpha, rad), see 'localpos_to_globalpos'
+    out : (N, 2) ndarray, optional
+        preallocated output buffer, reusable across calls in a loop.
+        Must not overlap 'points'
+
+    Return
+    ------
+    (N, 2) ndarray of points in the global coordinate system
+    """
+    pts = np.asarray(points, dtype=DEFAULT_DTYPE).reshape(-1, 2)
+    xo, yo, cos_a, sin_a = _local_sys_affine(local_sys)
+    rot = np.array([[cos_a, -sin_a], [sin_a, cos_a]])
+    if out is None:
+        return pts @ rot.T + (xo, yo)
+    np.matmul(pts, rot.T, out=out)
+    out += (xo, yo)
+    return out
 
-def to_globalpos(points: list, local_sys: tuple) -> list:
-    """Utility function to apply 'localpos_to_globalpos' to a list of points"""
 
-    return [localpos_to_globalpos(point, local_sys) for point in points]
+def batch_localpos_to_globalpos(points, local_sys: tuple):
+    """Alias of 'to_globalpos' kept for callers that adopted the batched
+    transform before the list-based helpers were vectorized"""
+    return to_globalpos(points, local_sys)
 
 
 def tround(fpt: tuple):
@@ -345,3 +501,13 @@ def tround(fpt: tuple):
     fx, fy = fpt
     return (round(fx), round(fy))
 
+
+def tround_batch(points):
+    """
+    Rounds a whole sequence of points at once.
+
+    One np.rint call over the stacked array replaces a Python round
+    call per coordinate; the result is an (N, 2) int32 ndarray
+    """
+    return np.rint(np.asarray(points).reshape(-1, 2)).astype(np.int32)
+
@@ -12,12 +12,13 @@ point in its range of vision.
 """
 
 # General imports
-from trace import logger
+from .trace import logger
 import csv
 import os
+import math
 import numpy as np
-import geom_utils as geom
-import shapes
+from . import geom_utils as geom
+from . import shapes
 
 # Sensor shape (Arrow) parameters
 ARROW_BASE = 2
@@ -75,7 +76,8 @@ class Sensor():
         self.shape.color(self.color)
 
         # Sensor physical ratings
-        self.beam = np.deg2rad(beam)
+        self.beam = math.radians(beam)
+        self.half_beam = self.beam / 2.0
         self.range = range
         self.out_of_range = OUT_OF_RANGE
         self.rho_phi_type = rho_phi_type
@@ -83,11 +85,18 @@ class Sensor():
         # Last measured point
         self.measured_point = ()
 
+        # Shape vertices rotated at the origin, cached with the angle
+        # they were rotated by: a rotate to the same orientation (as
+        # place() issues at every traslation-only movement) reuses them
+        # instead of redoing reset plus rotation
+        self._shape_rot_angle = None
+        self._shape_rot_points = None
+
 
     def __str__(self):
         """Format all relevant sensor parameter in a string"""
         str_pos = geom.str_point(self.position)
-        return "'{}': {}, {:.1f}°".format(self.name, str_pos, np.rad2deg(self.orientation))
+        return "'{}': {}, {:.1f}°".format(self.name, str_pos, math.degrees(self.orientation))
 
     def sensor_shape(self):
         """
@@ -148,16 +157,21 @@ class Sensor():
         """
         # Save new desired orientation
         if rad is False:
-            self.orientation = np.deg2rad(alpha)
+            self.orientation = math.radians(alpha)
         else:
             self.orientation = alpha
 
-        # Rotate sensor's shape
-        self.shape.reset()
-        self.shape.rotate(alpha, rad)
+        # Rotate sensor's shape, reusing the cached rotated vertices
+        # when the orientation did not change
+        if self._shape_rot_angle != self.orientation:
+            self.shape.reset()
+            self.shape.rotate(self.orientation, rad=True)
+            self._shape_rot_points = self.shape.points.copy()
+            self._shape_rot_angle = self.orientation
+        else:
+            self.shape.points = self._shape_rot_points.copy()
         xp, yp = self.position
         self.shape.traslate(xp, yp)
-        self.traslate(self.position)
 
 
     def place(self, position: tuple, angle: float, rad: bool = False):
@@ -249,7 +263,7 @@ class Sensor():
 
         Return
         ------
-        A list of measured points as returned by 'read()' method
+        An (N, 2) ndarray of (rho, phi) measures, one row per scan angle
         """
 
         # Save current sensor orientation
@@ -263,18 +277,22 @@ class Sensor():
         else:
             scan_step = step
 
-        # Scan_angles
-        scan_angles = np.arange(angle_from, angle_to, scan_step)
+        # Scan_angles: the grid is built from an integer ramp so a
+        # fractional step cannot accumulate rounding across the sweep
+        num_steps = int(np.ceil((angle_to - angle_from) / scan_step))
+        scan_angles = angle_from + scan_step * np.arange(num_steps)
 
-        # Run scanning
-        measures = []
-        for angle in scan_angles:
+        # Run scanning writing every reading into a preallocated array,
+        # one (rho, phi) row per angle
+        measures = np.empty((scan_angles.size, 2))
+        for row, angle in enumerate(scan_angles):
             if self.rho_phi_type:
                 rho, phi = self.read(angle)
             else:
                 phi, rho = self.read(angle)
-            
-            measures.append((rho, phi))
+
+            measures[row, 0] = rho
+            measures[row, 1] = phi
 
         # Now restore sensor orientation
         self.orientation = sensor_orientation
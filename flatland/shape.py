@@ -8,17 +8,18 @@
 # virtual environment.
 #
 """
-In the environment a geometric shape is represented by the list of its points.
+In the environment a geometric shape is represented by the array of its
+points, stored as a single contiguous (N, 2) ndarray with one point
+per row.
 
-A point is represented by a tuple of float.
-The meaning of a tuple point depends on the coordinate system referenced:
+The meaning of a point row depends on the coordinate system referenced:
 (x, y) in rectangular coordinats
 (r, theta) in polar coordinates
 
-At creation time, each point of a geometric shape is a tuple of float
+At creation time, each point of a geometric shape is a row of float
 numbers in rectangular coordinates and represents the shape in its
 coordinate system.
-The list of all points of a shape will remain untouched during all the
+The array of all points of a shape will remain untouched during all the
 life of the geometric shape.
 
 To position a geometric  shape into the virtual space, all the points
@@ -28,9 +29,10 @@ same space.
 """
 
 # General imports
-from trace import logger
+import math
+from .trace import logger
 import numpy as np
-import geom_utils as geom
+from . import geom_utils as geom
 
 
 # Abstract Shape class
@@ -47,16 +49,24 @@ class Shape():
     def __init__(self, res: float = 0.1):
         """
         Init the structures of the base Shape and its override composes
-        the list points of the particular shape
-        """
-        # List of points composing the shape into its coordinate system
-        # This list will be filled by points at creation time
-        self.shape_points = []
-
-        # List of shape's points after geometrig traslation and/or rotation
-        # This list must be used to graph the geometric shape positioned in
-        # the outer coordinate system
-        self.points = []
+        the array of points of the particular shape
+        """
+        # Points composing the shape into its coordinate system stored as
+        # a single (N, 2) ndarray, one point per row.
+        # This array will be filled by points at creation time.
+        # Appended batches are parked in '_pending_points' and merged into
+        # the array only when it is read, so repeated add_points calls
+        # stay amortized O(1) instead of re-copying the whole array
+        self._pending_points = []
+        self.shape_points = np.empty((0, 2), dtype=geom.DEFAULT_DTYPE)
+
+        # Shape's points after geometrig traslation and/or rotation.
+        # This array must be used to graph the geometric shape positioned in
+        # the outer coordinate system.
+        # After a reset it is shared with 'shape_points' (no copy) until
+        # the first transform detaches it
+        self.points = np.empty((0, 2), dtype=geom.DEFAULT_DTYPE)
+        self._points_is_shared = False
 
         # Resolution for Shapes points
         self.res = np.abs(res)
@@ -70,6 +80,35 @@ class Shape():
         self.pen_trait = "."
         self.pen_color = "b"
 
+    @property
+    def shape_points(self):
+        """The shape's own (N, 2) point array.
+
+        Batches parked by add_points are concatenated in a single bulk
+        copy the first time the array is read after an append
+        """
+        if self._pending_points:
+            self._shape_points = np.concatenate([self._shape_points]
+                                                + self._pending_points)
+            self._pending_points.clear()
+        return self._shape_points
+
+    @shape_points.setter
+    def shape_points(self, points):
+        self._shape_points = points
+        self._pending_points.clear()
+
+    def add_points(self, points):
+        """
+        Append points to the shape's own point array.
+
+        Accepts any sequence of (x, y) points (list of tuples or ndarray).
+        The batch is only parked here; consecutive appends are merged
+        into 'shape_points' lazily at the first read
+        """
+        new_points = np.asarray(points, dtype=geom.DEFAULT_DTYPE).reshape(-1, 2)
+        self._pending_points.append(new_points)
+
     def color(self, pen_color: str = "b"):
         """
         Set the shape's color for future show
@@ -86,44 +125,83 @@ class Shape():
         """
         Saves the current shape as default, so at .reset() will be restored
         """
+        if self._points_is_shared and not self._pending_points:
+            # The drawable array still is the master itself: nothing
+            # to store
+            return
         self.shape_points = self.points.copy()
 
     def reset(self):
         """Cancel every previous repositioning of the geometric shape.
 
         The current position becomes the same of the shape in its own
-        coordinate system
+        coordinate system.
+        No copy is taken here: the drawable array becomes the master
+        array itself and is only duplicated by the next transform
         """
-        self.points = self.shape_points.copy()
+        self.points = self.shape_points
+        self._points_is_shared = True
+
+    def _own_points(self):
+        """Detach the drawable array from the master before an
+        in-place write (see reset)"""
+        if self._points_is_shared:
+            self.points = self.points.copy()
+            self._points_is_shared = False
 
     def _set_rotation_angle(self, angle: float, rad: bool = True):
         """Helper method to convert and save rotation angle of the Shape
         """
         if rad is False:
-            self.angle = np.deg2rad(angle)
+            self.angle = math.radians(angle)
         else:
             self.angle = angle
 
     def rotate(self, angle: float, rad: bool = False):
-        """Rotate all Shapes's points"""
+        """Rotate all Shapes's points applying a 2x2 rotation matrix to
+        the whole point array at once.
+
+        The cos/sin pair comes from the shared geom cache, so the two
+        transcendental calls are paid once per distinct angle
+        """
         self._set_rotation_angle(angle, rad)
-        self.points = geom.rotate(self.points, angle, rad)
+        rot = geom.rotation_matrix(self.angle, True)
+        self._own_points()
+        np.matmul(self.points, rot.T, out=self.points)
 
     def traslate(self, x: float, y: float):
-        """Traslate Shape's points"""
-        self.points = geom.traslate(self.points, x, y)
+        """Traslate Shape's points as a single in-place array update"""
+        self._own_points()
+        self.points += (x, y)
+
+    def _apply_affine(self, rot, traslation):
+        """Apply a rotation matrix and a traslation to the point array
+        in one fused pass, reusing the owned buffer"""
+        self._own_points()
+        np.matmul(self.points, rot.T, out=self.points)
+        self.points += traslation
 
     def move(self, x: float, y: float, angle: float = 0, rad: bool = False):
-        """Rotate first and traslate after the Shape"""
+        """Rotate first and traslate after the Shape.
+
+        Both transformations are pre-composed into one homogeneous
+        matrix and applied in a single pass over the point array,
+        halving the traversals with respect to calling rotate and
+        traslate in sequence
+        """
         self._set_rotation_angle(angle, rad)
-        moved_points = geom.rotate(self.points, self.angle, rad)
+        mat = geom.affine_matrix(self.angle, x, y, rad=True)
         self.pos = (x, y)
-        self.points = geom.traslate(moved_points, x, y)
+        self._apply_affine(mat[:2, :2], mat[:2, 2])
 
     def get_points(self, shape_points: bool = False):
         """Returns the actual shape of the geometric figure.
 
         If flag shape_points is True the original shape's points are returned
+
+        The returned (N, 2) array is the internal storage itself, not
+        a copy: consumers batching many shapes (see load_env) can
+        concatenate it directly, but must not modify it in place
         """
         if shape_points is True:
             return self.shape_points
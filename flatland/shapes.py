@@ -14,10 +14,100 @@ virtual environment.
 """
 
 # General imports
-from trace import logger
+import math
+from .trace import logger
+from functools import lru_cache
 import numpy as np
-import geom_utils as geom
-from shape import Shape
+from . import geom_utils as geom
+from .shape import Shape
+
+
+@lru_cache(maxsize=128)
+def _rectangle_points(base: float, height: float, res: float):
+    """
+    Build, once per (base, height, res) triple, the read-only point
+    array of a rectangle with a vertex in the origin.
+
+    Rectangles of the same size and resolution share the same template,
+    so repeated constructions cost only a cache lookup
+    """
+    # The four vertex
+    vertex = np.array([(0.0, 0.0), (0.0, height), (base, height),
+                       (base, 0.0)])
+
+    # Each pair of sides comes out of one column_stack on the
+    # coordinate ramp instead of a Python loop appending tuples.
+    # linspace with an explicit count keeps the ramp size exact, with
+    # no float-boundary point gained or lost across platforms
+    xs = np.linspace(0.0, base, int(round(base / res)), endpoint=False)
+    ys = np.linspace(0.0, height, int(round(height / res)),
+                     endpoint=False)
+    bottom = np.column_stack((xs, np.zeros(xs.shape)))
+    top = np.column_stack((xs, np.full(xs.shape, height)))
+    left = np.column_stack((np.zeros(ys.shape), ys))
+    right = np.column_stack((np.full(ys.shape, base), ys))
+
+    pts = np.concatenate((vertex, bottom, top, left, right)) \
+            .astype(geom.DEFAULT_DTYPE, copy=False)
+    pts.flags.writeable = False
+    return pts
+
+
+@lru_cache(maxsize=128)
+def _circle_points(radius: float, res: float):
+    """
+    Build, once per (radius, res) pair, the read-only point array of a
+    circle centered at the origin.
+
+    The first point of the array is the circle center
+    """
+    angle_res = res / radius  # In radiants
+
+    # One cos/sin call over the whole angle ramp replaces the scalar
+    # trig of the old per-point loop; the explicit count makes the
+    # ring size exact
+    alphas = np.linspace(0.0, np.pi*2, int(round(np.pi*2 / angle_res)),
+                         endpoint=False)
+    ring = np.column_stack((radius * np.cos(alphas),
+                            radius * np.sin(alphas)))
+    pts = np.vstack(((0.0, 0.0), ring)).astype(geom.DEFAULT_DTYPE,
+                                               copy=False)
+    pts.flags.writeable = False
+    return pts
+
+
+@lru_cache(maxsize=128)
+def _arrow_points(base: float, height: float, res: float):
+    """
+    Build, once per (base, height, res) triple, the read-only point
+    array of an arrow with the base on the x axis.
+
+    Construction exploits the symmetry of the shape: only the left
+    semi-triangle is computed, the right side is its reflection
+    """
+    semi_base = base/2
+    vertex = np.array([(0.0, 0.0), (base, 0.0),
+                       (semi_base, height), (semi_base, 0.0)])
+
+    # Left side on polar coordinates, this ensure corect spacing.
+    # The angle is constant along the side, so the polar ramp
+    # collapses into one scalar cos/sin pair scaling the r vector
+    side, alpha = geom.cart2pol(semi_base, height)
+    rs = np.linspace(0.0, side, int(round(side / res)), endpoint=False)
+    left = np.concatenate((vertex,
+                           np.column_stack((rs * math.cos(alpha),
+                                            rs * math.sin(alpha)))))
+
+    # Right side by symmetry: one reflection of the left one about
+    # the height axis
+    right = left.copy()
+    right[:, 0] = 2*semi_base - right[:, 0]
+
+    pts = np.concatenate((left, right)).astype(geom.DEFAULT_DTYPE,
+                                               copy=False)
+    pts.flags.writeable = False
+    return pts
+
 
 class Rectangle(Shape):
     """
@@ -32,22 +122,8 @@ class Rectangle(Shape):
         self.base = base
         self.height = height
 
-        # Build all points of the geometric figure
-        # Add the four vertex
-        self.shape_points.append((0.0, 0.0))
-        self.shape_points.append((0.0, height))
-        self.shape_points.append((base, height))
-        self.shape_points.append((base, 0.0))
-
-        # Horizontal sides
-        for x in np.arange(0.0, base, self.res):
-            self.shape_points.append((x, 0.0))
-            self.shape_points.append((x, height))
-
-        # Vertical sides
-        for y in np.arange(0.0, height, self.res):
-            self.shape_points.append((0.0, y))
-            self.shape_points.append((base, y))
+        # Get all points of the geometric figure from the cached template
+        self.add_points(_rectangle_points(base, height, self.res))
 
         # Call reset in order to populate actual point list for
         # calculation and display
@@ -74,14 +150,8 @@ class Circle(Shape):
         self.radius = radius
         self.center = (0.0, 0.0)
 
-        # Save center as the first point of the shape point list
-        self.shape_points.append(self.center)
-
-        # Calculate circle points
-        for alpha in np.arange(0.0, np.pi*2, self.angle_res):
-            x = radius * np.cos(alpha)
-            y = radius * np.sin(alpha)
-            self.shape_points.append((x, y))
+        # Get center and circle points from the cached template
+        self.add_points(_circle_points(radius, self.res))
 
         # Call reset in order to populate actual point list for
         # calculation and display
@@ -108,33 +178,8 @@ class ArrowBase(Shape):
         self.C = (semi_base, height)
         self.H = (semi_base, 0.0)
 
-        # Save vertex into the point list
-        self.shape_points.append(self.A)
-        self.shape_points.append(self.B)
-        self.shape_points.append(self.C)
-        self.shape_points.append(self.H)
-
-        # Calculate side points
-        # Move on polar coordinates, this ensure corect spacing
-        side, alpha = geom.cart2pol(semi_base, height)
-        side_points = []
-        for r in np.arange(0.0, side, self.res):
-            side_points.append((r, alpha))
-
-        # Now return in rctangular coordinates
-        rside_points = geom.to_rect(side_points)
-
-        self.shape_points += rside_points
-
-        # Add right side by symmetry
-        right_side = []
-        for p in self.shape_points:
-            x, y = p
-            d = semi_base - x
-            x_right_side = semi_base + d
-            right_side.append((x_right_side, y))
-
-        self.shape_points += right_side
+        # Get all points of the geometric figure from the cached template
+        self.add_points(_arrow_points(base, height, self.res))
 
         # Call reset in order to populate actual point list for
         # calculation and display
@@ -148,12 +193,10 @@ class IsoscelesTriangle(ArrowBase):
     def __init__(self, base: float, height: float, res: float = 0.1):
         super().__init__(base, height, res)
 
-        # Add the points of th base
-        base_points = []
-        for x in np.arange(0.0, base, self.res):
-            base_points.append((x, 0.0))
-
-        self.shape_points += base_points
+        # Add the points of th base in one stacked batch
+        xs = np.linspace(0.0, base, int(round(base / self.res)),
+                         endpoint=False)
+        self.add_points(np.column_stack((xs, np.zeros(xs.shape))))
 
         # Call reset in order to populate actual point list for
         # calculation and display
@@ -186,13 +229,44 @@ class SeqPolygon(Shape):
         self.ref_point = (0.0, 0.0)  # At start is the origin
         self.skip = False # Skip flag false by default
 
+        # Two-pass construction: a first scan of the command list
+        # bounds the number of emitted points, so all segments are
+        # written into one preallocated buffer instead of growing
+        # intermediate batches
+        self._buf = np.empty((self._estimate_size(cmd_list), 2),
+                             dtype=geom.DEFAULT_DTYPE)
+        self._idx = 0
+
         for cmd_t in cmd_list:
             self._cmd_parser(cmd_t)
 
+        self.shape_points = self._buf[:self._idx]
+
         # Call reset in order to populate actual point list for
         # calculation and display
         self.reset()
 
+    def _estimate_size(self, cmd_list: list):
+        """Upper bound of the points the command list will emit.
+
+        Replays the commands tracking the skip flag; each traced
+        segment contributes at most length/res + 2 points
+        """
+        total = 0
+        skip = False
+        for command, param in cmd_list:
+            cmd = command.lower()
+            if cmd == 'skip':
+                flag = param.lower()
+                if (flag == 'true') or (flag == 'yes') or (flag == 'on'):
+                    skip = True
+                elif (flag == 'false') or (flag == 'no') or (flag == 'off'):
+                    skip = False
+            elif cmd in ('up', 'down', 'left', 'right'):
+                if skip is False:
+                    total += int(abs(param) / self.res) + 2
+        return total
+
     def _cmd_parser(self, cmd_t: tuple):
         command, param = cmd_t
 
@@ -227,14 +301,16 @@ class SeqPolygon(Shape):
             y1 = y0 - length
 
         if self.skip is False:
-            # Set set direction
-            if y1 >= y0:
-                step = self.res
-            else:
-                step = -self.res
-
-            for y in np.arange(y0, y1, step):
-                self.shape_points.append((x1, y))
+            # Write the segment straight into its slot of the
+            # preallocated buffer: no intermediate temporaries.
+            # linspace handles both directions and emits an exact
+            # number of points
+            num = int(round(abs(y1 - y0) / self.res))
+            yords = np.linspace(y0, y1, num, endpoint=False)
+            seg = self._buf[self._idx:self._idx + yords.size]
+            seg[:, 0] = x1
+            seg[:, 1] = yords
+            self._idx += yords.size
 
         # Save end point used as start for next side
         self.ref_point = (x1, y1)
@@ -252,14 +328,13 @@ class SeqPolygon(Shape):
             x1 = x0 - length
 
         if self.skip is False:
-            # Set set direction
-            if x1 >= x0:
-                step = self.res
-            else:
-                step = -self.res
-
-            for x in np.arange(x0, x1, step):
-                self.shape_points.append((x, y1))
+            # Same direct buffer fill as the vertical sides
+            num = int(round(abs(x1 - x0) / self.res))
+            xords = np.linspace(x0, x1, num, endpoint=False)
+            seg = self._buf[self._idx:self._idx + xords.size]
+            seg[:, 0] = xords
+            seg[:, 1] = y1
+            self._idx += xords.size
 
         # Save end point used as start for next side
         self.ref_point = (x1, y1)
@@ -296,12 +371,102 @@ class CompoundShape(Shape):
     to compose the compound object.
     """
 
-    def __init__(self, shapes: list, name: str = ""):
-        """Get points fron each single Shape in list"""
+    def __init__(self, shapes: list = None, name: str = ""):
+        """Get points fron each single Shape in list.
+
+        The default for 'shapes' is None (not an empty list) so no
+        mutable default is shared among instances
+        """
         super().__init__()
-        for shape in shapes:
-            self.shape_points += shape.get_points()
+        self.name = name
+        if shapes:
+            # One contiguous allocation for all sub-shapes instead of
+            # appending them one by one
+            self.shape_points = np.concatenate(
+                [shape.get_points() for shape in shapes])
         self.points = self.shape_points.copy()
+        # Set by every late append and checked lazily: the drawable
+        # points are realigned to shape_points only when actually read
+        self._stale_points = False
+        # Transforms are not applied eagerly either: they accumulate
+        # into one homogeneous matrix and touch the point array only
+        # at read time, no matter how many were chained
+        self._affine_acc = np.eye(3)
+        self._pending_affine = False
+
+    def add_shape(self, shape: Shape):
+        """Append the points of a single Shape to the compound"""
+        self.add_points(shape.get_points())
+
+    def add_points(self, points):
+        """Append points to the compound, deferring the refresh of the
+        drawable array to the next read"""
+        super().add_points(points)
+        self._stale_points = True
+
+    def rotate(self, angle: float, rad: bool = False):
+        """See Shape.rotate; the rotation is only accumulated here"""
+        self._set_rotation_angle(angle, rad)
+        self._affine_acc = geom.affine_matrix(self.angle, rad=True) @ self._affine_acc
+        self._pending_affine = True
+
+    def traslate(self, x: float, y: float):
+        """See Shape.traslate; the traslation is only accumulated here"""
+        self._affine_acc = geom.affine_matrix(0.0, x, y) @ self._affine_acc
+        self._pending_affine = True
+
+    def move(self, x: float, y: float, angle: float = 0, rad: bool = False):
+        """See Shape.move; the composed transform is only accumulated
+        here"""
+        self._set_rotation_angle(angle, rad)
+        self.pos = (x, y)
+        self._affine_acc = geom.affine_matrix(self.angle, x, y,
+                                              rad=True) @ self._affine_acc
+        self._pending_affine = True
+
+    def _materialize(self):
+        """Apply the pending state to the drawable point array.
+
+        Late appended points are folded in first, then all accumulated
+        transforms are applied with a single pass over the array
+        """
+        if self._stale_points:
+            super().reset()
+            self._stale_points = False
+        if self._pending_affine:
+            self._apply_affine(self._affine_acc[:2, :2],
+                               self._affine_acc[:2, 2])
+            self._affine_acc = np.eye(3)
+            self._pending_affine = False
+
+    def reset(self):
+        """See Shape.reset; pending appends and transforms are
+        discarded together with the applied ones"""
+        super().reset()
+        self._stale_points = False
+        self._affine_acc = np.eye(3)
+        self._pending_affine = False
+
+    def save(self):
+        """See Shape.save; pending state is applied first"""
+        self._materialize()
+        super().save()
+
+    def get_points(self, shape_points: bool = False):
+        """See Shape.get_points; pending appends and transforms are
+        applied here, once, before returning"""
+        self._materialize()
+        return super().get_points(shape_points)
+
+    def size(self):
+        """See Shape.size; counts pending appends as well"""
+        self._materialize()
+        return super().size()
+
+    def plot(self, shape_points: bool = False):
+        """See Shape.plot; applies pending state first"""
+        self._materialize()
+        super().plot(shape_points)
 
 # Test section --------------------------------------------------------------
 def test1():
@@ -364,7 +529,7 @@ def test3():
     logger.info("Sequence polygon test")
     room_sides = [('start', (0, 0)), ('right', 380), ('up', 30), ('left', 50), ('up', 40), ('left', 20), ('up', 300), ('right', 20), ('up', 30), ('skip', 'yes'), ('up', 80), ('skip', 'off'), ('up', 50), ('left', 40), ('skip', 'on'),('left', 80), ('skip', 'off'), ('left', 210), ('down', 430) ]
     room = SeqPolygon(room_sides)
-    logger.info("Num points= {}".format(room.size()))
+    logger.info("Num points= {}", room.size())
     room.show()
     room.traslate(0, -50)
     room.show()
@@ -6,5 +6,21 @@
 An attempt to implement a logging module shared among all others
 """
 
+import sys
 from loguru import logger
 
+# Console sink gated at WARNING by default: debug/info records issued
+# inside shape construction and movement hot loops are dropped before
+# any handler dispatch. Call set_debug() to lower the gate when
+# troubleshooting
+logger.remove()
+_console_sink = logger.add(sys.stderr, level="WARNING")
+
+
+def set_debug(level: str = "DEBUG"):
+    """Lower the console sink level (defaults to DEBUG) for a
+    debugging session
+    """
+    global _console_sink
+    logger.remove(_console_sink)
+    _console_sink = logger.add(sys.stderr, level=level)
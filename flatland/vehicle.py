@@ -17,19 +17,22 @@ Method parameters are always expressed in degrees
 """
 
 # Imports
-from trace import logger
+from .trace import logger
+import math
 logger.add("vehicle.log", mode="w")
 
-import shape
-import shapes
+from . import shape
+from . import shapes
 import numpy as np
 import matplotlib.pyplot as plt
 from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 
 # Project imports
-import geom_utils as geom
-from flatland import FlatLand
-from chassis_shape import ChassisShape
+from . import geom_utils as geom
+from .flatland import FlatLand
+from .chassis_shape import ChassisShape
+from . import virtual_sensor
 
 # Point type
 Point = namedtuple("Point", ["x", "y"])
@@ -61,12 +64,21 @@ class Vehicle():
         self.position = Point(0, 0)
 
         # Orientation is taken from the x (horizontal) axis and is stored
-        # in radian
+        # in radian.
+        # Its cos/sin pair changes only when the vehicle turns, so it is
+        # cached here and reused by every move along the same heading
         self.orientation = 0 # rad
-        
+        self._cos_o = 1.0
+        self._sin_o = 0.0
+
         # Vehicle path.
-        # List of vehicle position and orientation after every movement
-        self.path = []
+        # Position and orientation after every movement, stored as SoA
+        # columns in geometrically grown arrays: saving a pace costs
+        # three scalar stores and plotting is one sliced plt.plot call
+        self._path_x = np.empty(64, dtype=geom.DEFAULT_DTYPE)
+        self._path_y = np.empty(64, dtype=geom.DEFAULT_DTYPE)
+        self._path_angle = np.empty(64, dtype=geom.DEFAULT_DTYPE)
+        self._path_n = 0
         self.seq_counter = 0
 
         # Dimensions
@@ -86,22 +98,34 @@ class Vehicle():
         # Safe region shape
         self.safe_region = shapes.Circle(self.safe_radius, res=1)
 
-        # Sensor list as dictionay; this way you can read sensor by name
+        # Sensor list as dictionay; this way you can read sensor by name.
+        # A parallel packed list backs the per-movement loops, sparing
+        # the dict iteration and the by-name probe inside them
         self.sensors = dict()
+        self._sensor_list = []
+        # Mount points stacked as a (K, 2) array, built lazily at the
+        # first movement and invalidated by mount_sensor: the batched
+        # placement update reuses it instead of restacking per move
+        self._mnt_xy = None
         self.max_sensor_accuracy = 0
         
         # Flatland Environment 
         self.flatland = None
         
-        # Tracing flag
+        # Tracing flag.
+        # With tracing on, movements only buffer the vehicle position
+        # here; the buffer is drawn with one plot call by flush_trace
+        # instead of one matplotlib artist per movement
         self.tracing = False
+        self._trace_x = []
+        self._trace_y = []
         
 
     def __str__(self):
         """Returns a string with all vehicle data"""
         pos_str = geom.str_point(self.position)
         out_str = "Vehicle '{}': {}, {:.1f}°".format(self.name, pos_str,
-                                                np.rad2deg(self.orientation))
+                                                math.degrees(self.orientation))
         out_str += "\n"
         for sensor_id in self.sensors:
             out_str += self.sensors[sensor_id].__str__() + "\n"
@@ -118,11 +142,16 @@ class Vehicle():
         self.safe_radius = chassis_shape.outer_radius() + max_accuracy_val
 
     def _draw_vehicle_shape(self):
-        """Draws the vehicle shape according with its position and angular orientation"""
+        """Draws the vehicle shape according with its position and angular
+        orientation.
+
+        Rotation and traslation are pre-composed by Shape.move into one
+        affine matrix, so the point array is swept once instead of once
+        per transform
+        """
         self.shape.reset()
-        self.shape.rotate(self.orientation, True)
         posx, posy = self.position
-        self.shape.traslate(posx, posy)
+        self.shape.move(posx, posy, self.orientation, rad=True)
 
 
     def _save_datapath(self):
@@ -133,8 +162,26 @@ class Vehicle():
         stored data for a better graphical representation
         """
         self.seq_counter += 1
-        pace = DataPath(self.position.x, self.position.y, self.orientation, self.seq_counter)
-        self.path.append(pace)
+        n = self._path_n
+        if n == len(self._path_x):
+            # Grow the columns geometrically so the amortized append
+            # cost stays constant
+            self._path_x = np.resize(self._path_x, 2*n)
+            self._path_y = np.resize(self._path_y, 2*n)
+            self._path_angle = np.resize(self._path_angle, 2*n)
+        self._path_x[n] = self.position.x
+        self._path_y[n] = self.position.y
+        self._path_angle[n] = self.orientation
+        self._path_n = n + 1
+
+
+    @property
+    def path(self):
+        """The vehicle path as a list of DataPath tuples, rebuilt on
+        demand from the SoA columns"""
+        return [DataPath(self._path_x[i], self._path_y[i],
+                         self._path_angle[i], i + 1)
+                for i in range(self._path_n)]
 
 
     def trace(self, onoff: bool = False):
@@ -181,6 +228,23 @@ class Vehicle():
         self.safe_region = shapes.Circle(self.safe_radius, res=1)
 
 
+    def _update_sensors_placement(self):
+        """
+        Reposition all onboard sensors after a chassis movement.
+
+        All mount points are batch-transformed in one call, so the
+        chassis trig and matrix build are paid per movement instead
+        of per sensor
+        """
+        if self._mnt_xy is None:
+            self._mnt_xy = np.array([sensor.mnt_pt
+                                     for sensor in self._sensor_list],
+                                    dtype=geom.DEFAULT_DTYPE)
+        virtual_sensor.update_all_placements(self._sensor_list,
+                                             self.position,
+                                             self.orientation,
+                                             self._mnt_xy)
+
     def turn(self, angle: float):
         """
         Turn the vehicle.
@@ -201,26 +265,34 @@ class Vehicle():
         """
         
         # logger.debug("before_turn: {}".format(self.__str__()))
-        logger.debug("turn: {}°".format(angle)) 
-        
+        logger.debug("turn: {}°", angle)
+
+        if angle == 0.0:
+            # Nothing moved: skip the shape redraw and the sensor
+            # repositioning, just record the pace in the data path
+            self._save_datapath()
+            return
+
         # Update chassis orientation and orient its shape
-        self.orientation = self.orientation + np.deg2rad(angle)
+        # Scalar conversion: math.radians avoids the numpy 0-d ufunc
+        # dispatch on every turn
+        self.orientation = self.orientation + math.radians(angle)
+        self._cos_o = math.cos(self.orientation)
+        self._sin_o = math.sin(self.orientation)
         self._draw_vehicle_shape()
         
         # Update sensor orientation
-        for sensor_id in self.sensors:
-            self.sensors[sensor_id].update_placement(self.position,
-                                                     self.orientation)
+        self._update_sensors_placement()
 
         # Save data path
         self._save_datapath()
         
         # Perform light tracing if required
         if self.tracing is True:
-            self.light_plot()
+            self._buffer_trace_point()
 
         # Trace vehicle pose and orientation
-        logger.debug("after turn: {}".format(self.__str__()))
+        logger.debug("after turn: {}", self)
 
 
 
@@ -239,13 +311,21 @@ class Vehicle():
         """
         
         # logger.debug("before move: {}".format(self.__str__()))
-        logger.debug("move: {}".format(distance))
-        
-        # Calculate the cartesian absolute coordinates of the destination point
-        abs_dist = np.abs(distance)
-        
-        x_move = abs_dist * np.cos(self.orientation)
-        y_move = abs_dist * np.sin(self.orientation)
+        logger.debug("move: {}", distance)
+
+        if distance == 0.0:
+            # Nothing moved: skip the shape redraw and the sensor
+            # repositioning, just record the pace in the data path
+            self._save_datapath()
+            return
+
+        # Calculate the cartesian absolute coordinates of the destination
+        # point reusing the trig pair cached at the last turn.
+        # Plain abs: the builtin skips the numpy 0-d dispatch on a scalar
+        abs_dist = abs(distance)
+
+        x_move = abs_dist * self._cos_o
+        y_move = abs_dist * self._sin_o
         
         # Calculate the actual point
         if distance < 0:
@@ -260,17 +340,15 @@ class Vehicle():
         self._draw_vehicle_shape()
         
         # Now reposition all onboard sensors
-        for sensor_id in self.sensors:
-            self.sensors[sensor_id].update_placement(self.position,
-                                                     self.orientation)
+        self._update_sensors_placement()
         # Save data path
         self._save_datapath()
 
         # Perform light tracing if required
         if self.tracing is True:
-            self.light_plot()
+            self._buffer_trace_point()
 
-        logger.debug("after move: {}".format(self.__str__()))
+        logger.debug("after move: {}", self)
 
 
     def load_env(self, flatland: FlatLand):
@@ -290,7 +368,7 @@ class Vehicle():
             logger.error(error_msg)
             return None
             
-        logger.debug("Ping sensor '{}' at angle {}°".format(sensor_name, angle))
+        logger.debug("Ping sensor '{}' at angle {}°", sensor_name, angle)
         return self.sensors[sensor_name].ping(angle)
 
 
@@ -321,11 +399,22 @@ class Vehicle():
         
         if sensor_name == "all":
             logger.debug("Scanning 'all' sensors")
-            for s_name in self.sensors:
-                logger.debug("---Scanning sensor '{}'".format(s_name))
-                scan_data[s_name] = self.sensors[s_name].scan(angle_from, angle_to, angle_step)
+            if len(self.sensors) > 1:
+                # Sensor scans are independent of each other, so run them
+                # on one worker thread per sensor
+                with ThreadPoolExecutor(max_workers=len(self.sensors)) as pool:
+                    futures = {s_name: pool.submit(self.sensors[s_name].scan,
+                                                   angle_from, angle_to,
+                                                   angle_step)
+                               for s_name in self.sensors}
+                    for s_name, future in futures.items():
+                        scan_data[s_name] = future.result()
+            else:
+                for s_name in self.sensors:
+                    logger.debug("---Scanning sensor '{}'", s_name)
+                    scan_data[s_name] = self.sensors[s_name].scan(angle_from, angle_to, angle_step)
         elif sensor_name in self.sensors:
-            logger.debug("Scan sensor '{}'".format(sensor_name))
+            logger.debug("Scan sensor '{}'", sensor_name)
             scan_data[sensor_name] = self.sensors[sensor_name].scan(angle_from, angle_to, angle_step)
         else:
             error_msg = "ERROR - Scan failed. Sensor '{}' not found".format(sensor_name)
@@ -370,28 +459,51 @@ class Vehicle():
             If True, the readings are transformed from (phi, rho) to (rho, phi).
             Defaults to False
         """
-        
+
         map_scan = dict()
-        for sensor_id, readings in scan_data.items():
-            # Convert polar readings in radian
-            if invert_rho_phi:
-                rad_polar_readings = [(rho, np.deg2rad(deg_phi)) 
-                                    for deg_phi, rho in readings]
-            else:
-                rad_polar_readings = [(rho, np.deg2rad(deg_phi)) 
-                                    for rho, deg_phi in readings]
-                                    
-            rect_readings = geom.to_rect(rad_polar_readings)
-            
-            # Transform sensor reading in the vehicle reference system
-            sensor_ref = self.sensors[sensor_id].sys_ref()
-            vehicle_ref_readings = geom.to_globalpos(rect_readings, sensor_ref)
-            
-            # Transform vehicle readings into the map (external) reference
-            vehicle_ref = self.sys_ref()
-            map_readings = geom.to_globalpos(rect_readings, vehicle_ref)
-            map_scan[sensor_id] = map_readings
-            
+        if not scan_data:
+            return map_scan
+
+        # Stack all sensor readings into one (S, N, 2) batch; every
+        # sensor scans the same angle range so the rows line up
+        sensor_ids = list(scan_data)
+        readings = np.stack([np.asarray(scan_data[s_id])
+                             for s_id in sensor_ids])
+        if invert_rho_phi:
+            readings = readings[:, :, ::-1]
+
+        # Polar (angle in degrees) to rectangular conversion of the
+        # whole batch
+        rho = readings[:, :, 0]
+        phi = np.deg2rad(readings[:, :, 1])
+        rect_readings = np.stack((rho*np.cos(phi), rho*np.sin(phi)),
+                                 axis=-1)
+
+        # Transform sensor readings in the vehicle reference system:
+        # one (S, 2, 2) stack of rotation matrices applied to all sensor
+        # batches with a single einsum call
+        sensor_refs = np.array([self.sensors[s_id].sys_ref()[:3]
+                                for s_id in sensor_ids])
+        cos_s = np.cos(sensor_refs[:, 2])
+        sin_s = np.sin(sensor_refs[:, 2])
+        rot_s = np.empty((len(sensor_ids), 2, 2))
+        rot_s[:, 0, 0] = cos_s
+        rot_s[:, 0, 1] = -sin_s
+        rot_s[:, 1, 0] = sin_s
+        rot_s[:, 1, 1] = cos_s
+        vehicle_ref_readings = np.einsum('sij,spj->spi', rot_s,
+                                         rect_readings)
+        vehicle_ref_readings += sensor_refs[:, None, :2]
+
+        # Transform vehicle readings into the map (external) reference
+        xv, yv, alpha_v, _ = self.sys_ref()
+        cos_v, sin_v = np.cos(alpha_v), np.sin(alpha_v)
+        rot_v = np.array([[cos_v, -sin_v], [sin_v, cos_v]])
+        map_readings = vehicle_ref_readings @ rot_v.T + (xv, yv)
+
+        for s_idx, s_id in enumerate(sensor_ids):
+            map_scan[s_id] = map_readings[s_idx]
+
         return map_scan
 
 
@@ -400,8 +512,8 @@ class Vehicle():
         Add Vehicle shape and sensors to current plot
         """
         self.shape.plot()
-        for sensor in self.sensors:
-            self.sensors[sensor].plot()
+        for sensor in self._sensor_list:
+            sensor.plot()
 
         # Plot actual vehicle position
         geom.plot_point(self.position)
@@ -420,8 +532,8 @@ class Vehicle():
         A lighter version of plot method that plots only sensors and actual
         position of vehicle.
         """
-        for sensor_id in self.sensors:
-            self.sensors[sensor_id].plot()
+        for sensor in self._sensor_list:
+            sensor.plot()
 
         # Plot actual vehicle position
         geom.plot_point(self.position)
@@ -435,18 +547,35 @@ class Vehicle():
             self.safe_region.plot()
 
 
+    def _buffer_trace_point(self):
+        """Record the current position for the trace drawn at show time"""
+        self._trace_x.append(self.position.x)
+        self._trace_y.append(self.position.y)
+
+
+    def flush_trace(self, pen_color: str = "b"):
+        """
+        Draw all buffered trace points in a single plot call and
+        annotate the vehicle name at the last one, then empty the
+        buffer.
+        """
+        if not self._trace_x:
+            return
+
+        plt.plot(self._trace_x, self._trace_y, pen_color + "o")
+        name_point = Point(self._trace_x[-1], self._trace_y[-1] + 0.3)
+        geom.annotate_point(name_point, self.name)
+        self._trace_x = []
+        self._trace_y = []
+
+
     def plot_path(self, pen_color: str = "c"):
         """
         Plots the overall sequence of points collected after each movement.
         """
-        xs = []
-        ys = []
-        for data_pt in self.path:
-            xs.append(data_pt.x)
-            ys.append(data_pt.y)
-            
         pen = pen_color + "--"
-        plt.plot(xs, ys, pen)
+        plt.plot(self._path_x[:self._path_n], self._path_y[:self._path_n],
+                 pen)
         
 
     def show(self, title: str = "No title", label: str = ""):
@@ -455,6 +584,7 @@ class Vehicle():
         This function is ususlly usefull for debuggin purposes, because is
         in charge of the Flatland object to show the environment.
         """
+        self.flush_trace()
         geom.show(title, label)
 
 # Test sction ---------------------------------------------------------------
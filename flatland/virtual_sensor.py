@@ -28,20 +28,101 @@ Method parameters are always expressed in degrees
 """
 
 # Imports
+import math
 import os
 import sys
-import csv
 
 import numpy as np
 from collections import namedtuple
 
 # Project imports
-import geom_utils as geom
-from sensor import Sensor
+from .trace import logger
+from . import geom_utils as geom
+from .sensor import Sensor
 
 # Point type
 Point = namedtuple("Point", ["x", "y"])
 
+# Concatenated environment point arrays shared among all sensors that
+# load the same venv object list: the flattening work is paid once per
+# environment instead of once per sensor
+_ENV_CACHE = {}
+
+def invalidate_env_cache(venv=None):
+    """Drop the cached point array of 'venv', or every cached array
+    when no argument is given.
+
+    Call it when the objects of an already loaded environment change
+    """
+    if venv is None:
+        _ENV_CACHE.clear()
+    else:
+        _ENV_CACHE.pop(id(venv), None)
+
+# Scan angle grids keyed by (angle_from, angle_to, step): every sensor
+# of a vehicle sweeps the same angular range, so the ramp and its
+# degree-to-radian conversion are built once and shared instead of
+# being rebuilt per sensor per scan
+_SCAN_GRID_CACHE = {}
+_SCAN_GRID_CACHE_MAX = 32
+
+def _scan_grid(angle_from: float, angle_to: float, step: float):
+    """Return the memoized (scan_angles, directions) pair of a sweep.
+
+    Both arrays are read-only because they are shared among callers
+    """
+    key = (angle_from, angle_to, step)
+    grid = _SCAN_GRID_CACHE.get(key)
+    if grid is None:
+        # Integer ramp times step, as in Sensor.scan, so a fractional
+        # step cannot accumulate rounding across the sweep
+        num_steps = int(np.ceil((angle_to - angle_from) / step))
+        scan_angles = angle_from + step * np.arange(num_steps)
+        directions = np.deg2rad(scan_angles)
+        scan_angles.flags.writeable = False
+        directions.flags.writeable = False
+        if len(_SCAN_GRID_CACHE) >= _SCAN_GRID_CACHE_MAX:
+            _SCAN_GRID_CACHE.clear()
+        grid = _SCAN_GRID_CACHE[key] = (scan_angles, directions)
+    return grid
+
+def update_all_placements(sensors: list, chassis_pos: Point,
+                          chassis_rot: float, mnt_pts: np.ndarray = None):
+    """
+    Reposition every sensor of a chassis after one movement.
+
+    All mount points are stacked into a (K, 2) array and rotated with
+    one matrix product, so the chassis trig and the per-point Python
+    work are paid once per movement instead of once per sensor.
+    Equivalent to calling update_placement on each sensor.
+
+    Parameters
+    ----------
+    sensors : list
+        VirtualSensor instances mounted on the same chassis
+    chassis_pos : Point
+        chassis position after the movement
+    chassis_rot : float
+        chassis orientation in radian units after the movement
+    mnt_pts : np.ndarray
+        optional (K, 2) array of the sensor mount points, one row per
+        sensor in the same order. The mounting poses never change, so
+        a vehicle can stack them once and share the array across every
+        movement instead of having it rebuilt here each time
+    """
+    if not sensors:
+        return
+
+    rot = geom.rotation_matrix(chassis_rot, True)
+    if mnt_pts is None:
+        mnt_pts = np.array([sensor.mnt_pt for sensor in sensors],
+                           dtype=geom.DEFAULT_DTYPE)
+    world_pts = mnt_pts @ rot.T + (chassis_pos.x, chassis_pos.y)
+
+    for sensor, (wx, wy) in zip(sensors, world_pts):
+        sensor.place(Point(wx, wy), sensor.mnt_orient + chassis_rot, True)
+
+
 class VirtualSensor(Sensor):
     """
     Stores all data related to the sensor mounting on the chassis and the
@@ -72,11 +153,11 @@ class VirtualSensor(Sensor):
         # Init base class
         super().__init__(name, beam, range, accuracy)
 
-        # List of points in the range of the sensor.
+        # Points in the range of the sensor, as an (M, 2) ndarray.
         # The local points of the sensor can be calculated using only
-        # these boints because the other cannot be detected by the sensor.
+        # these points because the other cannot be detected by the sensor.
         # Using these points only allows a speed improvement
-        self.surroundings = []
+        self.surroundings = np.empty((0, 2), dtype=geom.DEFAULT_DTYPE)
 
         # Surrounding boundaries
         self.xwest = 0.0
@@ -84,17 +165,33 @@ class VirtualSensor(Sensor):
         self.ynorth = 0.0
         self.ysouth = 0.0
 
-        # List of environment points; this way the list of a static
-        # environment can be calculate only once and shared with all other
-        # sensors of the same type in the same environment until it changes
-        self.env_points = []
-
-        # This list represents the environment in the point of view of
-        # the sensor, in the sense that it is facing its own axis (x axis)
-        # This list of points chages at each time the sensor moves on at
+        # Environment points batched into an (N, 2) ndarray; this way the
+        # points of a static environment can be calculated only once and
+        # shared with all other sensors of the same type in the same
+        # environment until it changes
+        self.env_points = np.empty((0, 2), dtype=geom.DEFAULT_DTYPE)
+
+        # Uniform grid over the environment: points bucketed into
+        # square cells sized on the sensor range, so each surroundings
+        # query touches only the cells around the sensor instead of the
+        # whole environment
+        self._env_grid = None
+        self._grid_cell = 0.0
+
+        # This (N, 2) array of (rho, phi) rows represents the environment
+        # in the point of view of the sensor, in the sense that it is
+        # facing its own axis (x axis)
+        # These points chage at each time the sensor moves on at
         # diffrent position.
         # Each instance of a sensor have its own point of view
-        self.local_polar_points = []
+        self.local_polar_points = np.empty((0, 2),
+                                           dtype=geom.DEFAULT_DTYPE)
+
+        # Point of view sorted by phi: read() locates its beam window
+        # with two binary searches on these columns instead of masking
+        # the whole array per ray
+        self._phi_sorted = np.empty(0, dtype=geom.DEFAULT_DTYPE)
+        self._rho_sorted = np.empty(0, dtype=geom.DEFAULT_DTYPE)
 
         # For debugging purposes, store the measured point and real point
         # of the last read.
@@ -104,19 +201,20 @@ class VirtualSensor(Sensor):
         # Sensor mount point and orientation relative to vehicle coordinate
         # system
         self.mnt_pt = mnt_pt
-        self.mnt_orient = np.deg2rad(mnt_orient)
+        self.mnt_orient = math.radians(mnt_orient)
 
 
     def __str__(self):
         """Add to Sensor parameters SensorDevice mounting data"""
         str_pos = geom.str_point(self.mnt_pt)
-        return "Dev [{}] {}, {:.1f}°".format(super().__str__(), str_pos, np.rad2deg(self.mnt_orient))
+        return "Dev [{}] {}, {:.1f}°".format(super().__str__(), str_pos, math.degrees(self.mnt_orient))
 
 
-    def load_env(self, venv: list):
+    def load_env(self, venv):
         """
-        Load virtual space environment as a list of compound objetcs
-        and shapes.
+        Load virtual space environment either as a list of compound
+        objetcs and shapes or as an already batched (N, 2) point array
+        (see FlatLand.venv_points).
         This ensable of points will be used for all readings.
 
         Pay attention
@@ -128,15 +226,56 @@ class VirtualSensor(Sensor):
         be rebuilt
         """
         # Load evnvironment points
-        if self.env_points == []:
-            for obj in venv:
-                self.env_points += obj.get_points()
+        if self.env_points.size == 0:
+            if isinstance(venv, np.ndarray):
+                # Cast only when the working dtype differs (e.g. when
+                # geom.DEFAULT_DTYPE is switched to float32 to halve
+                # the bandwidth of the filter and polar sweeps)
+                self.env_points = np.asarray(venv,
+                                             dtype=geom.DEFAULT_DTYPE)
+            else:
+                # Sensors sharing the same venv list share the same
+                # concatenated array through the module cache
+                key = id(venv)
+                env_points = _ENV_CACHE.get(key)
+                if env_points is None:
+                    env_points = np.vstack(
+                        [np.asarray(obj.get_points(),
+                                    dtype=geom.DEFAULT_DTYPE)
+                         for obj in venv])
+                    _ENV_CACHE[key] = env_points
+                self.env_points = env_points
+
+        # Index the loaded points into the uniform grid
+        self._build_env_grid()
 
         # Build sensor point of view at its actual position and orientation
         self._sensor_point_of_view()
 
         return len(self.env_points)
 
+    def _build_env_grid(self):
+        """
+        Bucket the environment points into a uniform grid of square
+        cells whose side is the sensor range.
+
+        A surroundings query around any position then intersects at
+        most a 3x3 block of cells, making its cost proportional to the
+        local point density instead of the whole environment size
+        """
+        cell = float(self.range) if self.range > 0 else 1.0
+        cell_ij = np.floor(self.env_points / cell).astype(np.int64)
+
+        # Group the point array by cell with one sort
+        keys, inverse = np.unique(cell_ij, axis=0, return_inverse=True)
+        order = np.argsort(inverse, kind='stable')
+        counts = np.bincount(inverse)
+        chunks = np.split(self.env_points[order], np.cumsum(counts)[:-1])
+
+        self._env_grid = {tuple(key): chunk
+                          for key, chunk in zip(keys, chunks)}
+        self._grid_cell = cell
+
 
     def _surroundings(self):
         """
@@ -155,11 +294,33 @@ class VirtualSensor(Sensor):
         self.ynorth = ypos + self.range
         self.ysouth = ypos - self.range
 
-        self.surroundings = []
-        for xp, yp in self.env_points:
-            if ((xp >= self.xwest) and (xp <= self.xeast)) and \
-               ((yp <= self.ynorth) and (yp >= self.ysouth)):
-                self.surroundings.append((xp, yp))
+        # Candidate points come from the grid cells overlapping the
+        # range box, not from the whole environment
+        if self._env_grid is not None:
+            cell = self._grid_cell
+            i_lo = int(np.floor(self.xwest / cell))
+            i_hi = int(np.floor(self.xeast / cell))
+            j_lo = int(np.floor(self.ysouth / cell))
+            j_hi = int(np.floor(self.ynorth / cell))
+            buckets = [self._env_grid[key]
+                       for key in ((i, j)
+                                   for i in range(i_lo, i_hi + 1)
+                                   for j in range(j_lo, j_hi + 1))
+                       if key in self._env_grid]
+            candidates = (np.concatenate(buckets) if buckets
+                          else np.empty((0, 2),
+                                        dtype=geom.DEFAULT_DTYPE))
+        else:
+            candidates = self.env_points
+
+        # Two-phase rejection: the x bounds first, then the y bounds
+        # only on the survivors. When the x span rejects most points
+        # the y columns of the rejected rows are never touched
+        xs = candidates[:, 0]
+        x_pass = candidates[(xs >= self.xwest) & (xs <= self.xeast)]
+        ys = x_pass[:, 1]
+        self.surroundings = x_pass[(ys >= self.ysouth)
+                                   & (ys <= self.ynorth)]
         return len(self.surroundings)
 
 
@@ -182,19 +343,23 @@ class VirtualSensor(Sensor):
         # Prepare local infos
         xo, yo = self.position
 
-        # Note that the rotation of the local coordinate system (the one
-        # of the sensor) is opposite to the sensor orientation
-        alpha = -self.orientation  # radiant
-        local_sys = (xo, yo, alpha, True)
-
-        local_points = []
-        for point in self.surroundings:
-            # Calculate and save local point
-            local_point = geom.globalpos_to_localpos(point, local_sys)
-            local_points.append(local_point)
-
-        # Transform to polar
-        self.local_polar_points = geom.to_polar(local_points)
+        # The rotation into the sensor frame is folded directly into
+        # the polar conversion: the modulus is invariant under rotation
+        # and the local angle is just the global one minus the sensor
+        # orientation. This skips the intermediate rotated array and
+        # one full pass over the points
+        dx = self.surroundings[:, 0] - xo
+        dy = self.surroundings[:, 1] - yo
+        rho = np.hypot(dx, dy)
+        phi = np.arctan2(dy, dx) - self.orientation
+        phi = ((phi + np.pi) % (2*np.pi)) - np.pi
+        self.local_polar_points = np.stack((rho, phi), axis=1)
+
+        # Sort once by phi so every read() of this point of view can
+        # slice its beam window in O(log N)
+        order = np.argsort(self.local_polar_points[:, 1])
+        self._rho_sorted = self.local_polar_points[order, 0]
+        self._phi_sorted = self.local_polar_points[order, 1]
 
     def plot_surroundings(self):
         """
@@ -233,15 +398,17 @@ class VirtualSensor(Sensor):
         # orientation of the chassis
         dev_orient = self.mnt_orient + chassis_rot
 
-        # Calculate the new position of the mount point of the sensor as
-        # effect of the chassis rotation
-        new_mnt_x, new_mnt_y = geom.rotate([self.mnt_pt], chassis_rot, rad=True)[0]
-
-        # New absolute position
-        newdev_x = chassis_pos.x + new_mnt_x
-        newdev_y = chassis_pos.y + new_mnt_y
+        # Rotate the single mount point with four scalar products on
+        # the cached rotation matrix entries: for one point this beats
+        # composing and multiplying homogeneous 3x3 frames.
+        # A vehicle repositioning many sensors goes through the batched
+        # update_all_placements instead
+        rot = geom.rotation_matrix(chassis_rot, True)
+        mx, my = self.mnt_pt
+        wx = chassis_pos.x + mx*rot[0, 0] + my*rot[0, 1]
+        wy = chassis_pos.y + mx*rot[1, 0] + my*rot[1, 1]
 
-        self.place(Point(newdev_x, newdev_y), dev_orient, True)
+        self.place(Point(wx, wy), dev_orient, True)
 
 
     def sys_ref(self):
@@ -293,21 +460,43 @@ class VirtualSensor(Sensor):
         the orientation angle.
         Angle is expressed in degrees
         """
-        # Filter taking only points into the beam
-        # TODO - Make this filtering sorting points by angle and using list comprehensions
-        at_angle_dir = np.deg2rad(at_angle)
-        into_beam_points = []
-        for r, phi in self.local_polar_points:
-            if (phi >= (at_angle_dir - self.beam/2)) and (phi <= (at_angle_dir + self.beam/2)):
-                into_beam_points.append((r, phi))
-
-        if into_beam_points == []:
-            # If any, all points are too far for the sensor
-            return (0.0, at_angle)
-
-        # Get the point of minimum module
-        detected_point = min(into_beam_points)
-        self.detected_point = (detected_point[0], np.rad2deg(detected_point[1]))
+        # Locate the beam window with two binary searches on the
+        # phi-sorted point of view: the candidate points are then a
+        # contiguous slice instead of a full-array mask per ray.
+        # Both window bounds are wrapped into (-pi, pi], the same
+        # interval of the stored phi values, so a beam straddling the
+        # -pi/pi cut does not silently lose the far side
+        at_angle_dir = math.radians(at_angle)
+        two_pi = 2.0 * math.pi
+        lo = ((at_angle_dir - self.half_beam + math.pi) % two_pi) - math.pi
+        hi = ((at_angle_dir + self.half_beam + math.pi) % two_pi) - math.pi
+        lo_idx = np.searchsorted(self._phi_sorted, lo, 'left')
+        hi_idx = np.searchsorted(self._phi_sorted, hi, 'right')
+
+        if lo <= hi:
+            window = self._rho_sorted[lo_idx:hi_idx]
+            if window.size == 0:
+                # If any, all points are too far for the sensor
+                return (0.0, at_angle)
+
+            # Get the point of minimum module
+            idx = lo_idx + np.argmin(window)
+        else:
+            # The beam straddles the cut: its window is a suffix plus
+            # a prefix of the sorted arrays
+            suffix = self._rho_sorted[lo_idx:]
+            prefix = self._rho_sorted[:hi_idx]
+            if suffix.size == 0 and prefix.size == 0:
+                return (0.0, at_angle)
+
+            smin = suffix.min() if suffix.size else np.inf
+            pmin = prefix.min() if prefix.size else np.inf
+            if smin <= pmin:
+                idx = lo_idx + int(np.argmin(suffix))
+            else:
+                idx = int(np.argmin(prefix))
+        self.detected_point = (self._rho_sorted[idx],
+                               math.degrees(self._phi_sorted[idx]))
 
         # Get the distance only, discarding the detected point angle
         measure, theta = self.detected_point
@@ -324,6 +513,79 @@ class VirtualSensor(Sensor):
         return self.measured_point
 
 
+    def scan(self, angle_from: float, angle_to: float, step: float = 1.0):
+        """
+        Simulate mulitple sensor readings in an angle range.
+
+        Same contract of Sensor.scan, but all beam minima come out of
+        one vectorized pass: the beam windows of every scan angle are
+        located with two batched searchsorted calls on the phi-sorted
+        point of view and reduced with np.minimum.reduceat, instead of
+        one read() call per angle.
+
+        Return
+        ------
+        An (N, 2) ndarray of (rho, phi) measures, one row per scan angle
+        """
+        # Set scan step
+        scan_step = 1.0
+        if step < 1.0:
+            logger.warning("Actual step is less than 1 deg: forced to 1 deg.")
+            scan_step = 1.0
+        else:
+            scan_step = step
+
+        # Scan angles and their radian conversion come from the shared
+        # grid cache: a vehicle scanning all its sensors over the same
+        # range pays the ramp construction once
+        scan_angles, directions = _scan_grid(angle_from, angle_to,
+                                             scan_step)
+
+        # The point of view built at the last movement is shared by
+        # every angle of the sweep: only the cached sorted columns are
+        # read below, nothing is rebuilt per angle. With no point of
+        # view (empty or not yet loaded environment) every ray reads 0
+        phi_sorted = self._phi_sorted
+        rho_sorted = self._rho_sorted
+        if rho_sorted.size == 0:
+            return np.stack((np.zeros(scan_angles.size), scan_angles),
+                            axis=1)
+
+        # Beam window boundaries of every angle, found in one pass.
+        # The bounds are wrapped into (-pi, pi) like the stored phi
+        # values so beams straddling the -pi/pi cut stay correct
+        two_pi = 2.0 * np.pi
+        lo = ((directions - self.half_beam + np.pi) % two_pi) - np.pi
+        hi = ((directions + self.half_beam + np.pi) % two_pi) - np.pi
+        lo_idx = np.searchsorted(phi_sorted, lo, 'left')
+        hi_idx = np.searchsorted(phi_sorted, hi, 'right')
+        wrapped = lo > hi
+        valid = wrapped | (hi_idx > lo_idx)
+
+        # Minimum module per plain window. The inf sentinel makes every
+        # window index valid for reduceat; empty windows are masked out
+        rho_pad = np.append(rho_sorted, np.inf)
+        pairs = np.stack((lo_idx, hi_idx), axis=1).ravel()
+        window_min = np.minimum.reduceat(rho_pad, pairs)[::2]
+
+        # A wrapped window is a suffix plus a prefix of the sorted
+        # array; both minima come from running minima in O(1) per angle
+        if wrapped.any():
+            inf = np.array([np.inf])
+            pre_min = np.concatenate(
+                (inf, np.minimum.accumulate(rho_sorted)))
+            suf_min = np.concatenate(
+                (np.minimum.accumulate(rho_sorted[::-1])[::-1], inf))
+            wrap_min = np.minimum(suf_min[lo_idx], pre_min[hi_idx])
+            window_min = np.where(wrapped, wrap_min, window_min)
+
+        # No echo (empty window) and out of range measures read as 0.0
+        measures = np.where(valid & np.isfinite(window_min),
+                            window_min, 0.0)
+        measures[measures > self.range] = 0.0
+
+        return np.stack((measures, scan_angles), axis=1)
+
     def traslate(self, position: tuple, spov: bool = True):
         """
         Traslate the sensor and updates the sensor point of view in order
@@ -342,14 +604,27 @@ class VirtualSensor(Sensor):
         So the rotation of the sensor shape it's a movement compoed
         by rotation and traslation.
 
-        The new orientation is saved
-        """
-        super().rotate(alpha, rad, spov)
+        The new orientation is saved.
 
-        # As sensor has rotated, recostruct its point of view
-        # TODO - Rotation is particular movement, optimization is possible
-        if spov is True:
-            self._sensor_point_of_view()
+        A pure rotation leaves the position, hence the surroundings and
+        all the moduli, untouched: only the phi column of the point of
+        view shifts by the orientation delta. So instead of the full
+        O(N) rebuild with its trig, the stored phi values are shifted,
+        re-wrapped into (-pi, pi] and re-sorted
+        """
+        old_orientation = self.orientation
+        # spov=False: the base rotation must not trigger the full
+        # point-of-view rebuild the phi shift below replaces
+        super().rotate(alpha, rad, spov=False)
+
+        if spov is True and self._phi_sorted.size > 0:
+            d_orient = self.orientation - old_orientation
+            phi = ((self._phi_sorted - d_orient + np.pi) % (2*np.pi)) - np.pi
+            order = np.argsort(phi)
+            self._phi_sorted = phi[order]
+            self._rho_sorted = self._rho_sorted[order]
+            self.local_polar_points = np.stack((self._rho_sorted,
+                                                self._phi_sorted), axis=1)
 
 # TEST -------------------------------------------------------------
 def load_measures(sensor: VirtualSensor, fname: str):
@@ -362,7 +637,7 @@ def load_measures(sensor: VirtualSensor, fname: str):
     """
     if os.path.exists(fname) is False:
         logger.warning("Measure file '{}' not found.".format(fname))
-        return []
+        return np.empty((0, 2), dtype=geom.DEFAULT_DTYPE)
 
     # File exists, try to load its content
 
@@ -371,26 +646,16 @@ def load_measures(sensor: VirtualSensor, fname: str):
     alpha = sensor.orientation # radiant
     local_sys = (xo, yo, alpha, True)
 
-    local_measures = []
-    with open(fname, newline='') as csvfile:
-        data_points = csv.reader(csvfile, delimiter=';')
-        data_points.__next__()
-        offset = np.pi/2.0
-        for phi, r in data_points:
-            # Polar meas
-            rho = float(r)
-            theta = float(phi) - offset
-
-            # Transform point in rectangular coordinates
-            rect_point = geom.pol2cart(rho, theta)
-
-            # Return the point into the GLOBAL coordinate system
-            meas_point = geom.localpos_to_globalpos(rect_point, local_sys)
-
-            # Add to measures list
-            local_measures.append(meas_point)
+    # Parse the whole file in one shot, then convert every measure to
+    # rectangular coordinates and to the GLOBAL coordinate system with
+    # two batched passes instead of a Python loop over the rows
+    data = np.loadtxt(fname, delimiter=';', skiprows=1,
+                      dtype=geom.DEFAULT_DTYPE, ndmin=2)
+    theta = data[:, 0] - np.pi/2.0
+    rho = data[:, 1]
+    rect_points = np.stack((rho*np.cos(theta), rho*np.sin(theta)), axis=1)
 
-    return local_measures
+    return geom.to_globalpos(rect_points, local_sys)
 
 
 def main():
@@ -17,21 +17,21 @@ Method parameters are always expressed in degrees
 """
 
 # Imports
-from trace import logger
+from .trace import logger
 logger.add("vehicle.log", mode="w")
 
-import shape
-import shapes
+from . import shape
+from . import shapes
 import numpy as np
 import matplotlib.pyplot as plt
 from collections import namedtuple
 
 # Project imports
-import geom_utils as geom
-from virtual_sensor import VirtualSensor
-from vehicle import Vehicle, ChassisShape
-from flatland import FlatLand
-from shapes import Circle
+from . import geom_utils as geom
+from .virtual_sensor import VirtualSensor
+from .vehicle import Vehicle, ChassisShape
+from .flatland import FlatLand
+from .shapes import Circle
 
 
 # Point type
@@ -89,65 +89,24 @@ class VirtualVehicle(Vehicle):
         x_min, x_max = self.shape.x_min_max()
         y_min, y_max = self.shape.y_min_max()
 
-        if ((mnt_pt.x < x_min) or (mnt_pt.x > x_max)):
-            return False
-
-        if ((mnt_pt.y < y_min) or (mnt_pt.y > y_max)):
+        # Single chained bounds check in place of four separate
+        # branches. The chassis is not centered on the track axle, so
+        # the bounds stay asymmetric min/max pairs rather than one
+        # abs() comparison against the half dimensions
+        if not (x_min <= mnt_pt.x <= x_max and y_min <= mnt_pt.y <= y_max):
             return False
 
+        if name in self.sensors:
+            # Remounting under the same name replaces the old sensor in
+            # the packed list too
+            self._sensor_list.remove(self.sensors[name])
         self.sensors[name] = VirtualSensor(name, beam, range, accuracy, mnt_pt, mnt_orient)
+        self._sensor_list.append(self.sensors[name])
+        self._mnt_xy = None  # The stacked mount points are stale now
         self.sensors[name].update_placement(self.position, self.orientation)
         return True
 
 
-    def move(self, distance: float):
-        """
-        Place the vehicle at the end of the segment of length 'distance'
-        along the direction defined by its orientation.
-
-        :Arguments:
-        :param dir: direction of the desired movement. Could take only two values forward and backward
-        :type dir: Vehicle constants FORWARD, FWD, BACKWARD, BACK
-        :param distance: distance at which the vehicle will stop. Negative values will be transformed in positive.
-        :type distance: float in length unit defined for the overall simulation.
-         
-        """
-        
-        # logger.debug("before move: {}".format(self.__str__()))
-        logger.debug("move: {}".format(distance))
-        
-        # Calculate the cartesian absolute coordinates of the destination point
-        abs_dist = np.abs(distance)
-        
-        x_move = abs_dist * np.cos(self.orientation)
-        y_move = abs_dist * np.sin(self.orientation)
-        
-        # Calculate the actual point
-        if distance < 0:
-            x_move = -x_move
-            y_move = -y_move
-        
-        # Now traslate vehicle at that point
-        x_dest = self.position.x + x_move
-        y_dest = self.position.y + y_move
-        
-        self.position = Point(x_dest, y_dest)
-        self._draw_vehicle_shape()
-        
-        # Now reposition all onboard sensors
-        for sensor_id in self.sensors:
-            self.sensors[sensor_id].update_placement(self.position,
-                                                     self.orientation)
-        # Save data path
-        self._save_datapath()
-
-        # Perform light tracing if required
-        if self.tracing is True:
-            self.light_plot()
-
-        logger.debug("after move: {}".format(self.__str__()))
-
-
     def load_env(self, flatland: FlatLand):
         """
         In order to interact with the virtual environment, the vehicle
@@ -162,9 +121,9 @@ class VirtualVehicle(Vehicle):
         # Store flatland environment
         self.flatland = flatland
         
-        # Push the environment into the sensors
-        for sensor_id in self.sensors:
-            self.sensors[sensor_id].load_env(self.flatland.venv)
+        # Push the batched environment points into the sensors
+        for sensor in self._sensor_list:
+            sensor.load_env(self.flatland.venv_points)
 
 
     def ping(self, sensor_name: str, angle: float):
@@ -176,50 +135,10 @@ class VirtualVehicle(Vehicle):
             return None
         
         ping_res = self.sensors[sensor_name].ping(angle)
-        logger.debug("Ping sensor '{}' at angle {}° = {}".format(sensor_name, angle, ping_res))
+        logger.debug("Ping sensor '{}' at angle {}° = {}", sensor_name, angle, ping_res)
         return ping_res
 
 
-    def scan(self, sensor_name: str, 
-                angle_from: float = -90, 
-                angle_to: float = 90, 
-                angle_step: float = 1):
-        """
-        Perform a sensor scan of the virtual environment loaded.
-        
-        It is possible to scan all sensors or a single sensor by name.
-        The same angle ranges will be applaied to all sensors.
-        A dictionry of readings is returned with key the name of the sensor
-        
-        Parameters
-        ----------
-        sensor_name: str
-            Name of the sensoe to read
-        angle_from, angle_to, angle_step : float
-            See description of Sensor.scan() method
-            
-        Return
-        ------
-        {} empty dict in error case
-        {"sensor1": [(rho1, phi1), (rho2, phi2), ...], ...}
-        """
-        scan_data = dict()
-        
-        if sensor_name == "all":
-            logger.debug("Scanning 'all' sensors")
-            for s_name in self.sensors:
-                logger.debug("---Scanning sensor '{}'".format(s_name))
-                scan_data[s_name] = self.sensors[s_name].scan(angle_from, angle_to, angle_step)
-        elif sensor_name in self.sensors:
-            logger.debug("Scan sensor '{}'".format(sensor_name))
-            scan_data[sensor_name] = self.sensors[sensor_name].scan(angle_from, angle_to, angle_step)
-        else:
-            error_msg = "ERROR - Scan failed. Sensor '{}' not found".format(sensor_name)
-            logger.error(error_msg)
-            
-        return scan_data
-
-
     def stop(self):
         """In real vehicle send command to stops currect action"""
         raise NotImplementedError()
@@ -230,59 +149,6 @@ class VirtualVehicle(Vehicle):
         raise NotImplementedError()
 
 
-    def scan_to_map(self, scan_data: dict, invert_rho_phi: bool = False):
-        """
-        Point transformation from sensor's local reference into the 'map' 
-        (global) reference system.
-        
-        Readings obtaiened from each SensorDevice are in polar coordinates and
-        are related to its local system reference.
-        This method implements these transformation reference:
-            - from polar to rectangular
-            - from sensor local reference to vehicle reference
-            - from vehicle reference to global (i.e. external) reference
-        The global, vehicle-external reference is the system reference of the
-        map built by the vehicle during its exploration.
-        The origin of the global reference system coincide with the position
-        of the vehicle at exploration start.
-        
-        Parameters
-        ----------
-        scan_data : dict
-            dictionary of range measurements as returned by 'scan' method
-        invert_rho_phi : bool
-            Real sensor can return polar readings in tutle (phi, rho) instead
-            of (rho, phi).
-            If True, the readings are transformed from (phi, rho) to (rho, phi).
-            Defaults to False
-        """
-        
-        map_scan = dict()
-        for sensor_id, readings in scan_data.items():
-            # Convert polar readings in radian
-            if invert_rho_phi:
-                rad_polar_readings = [(rho, np.deg2rad(deg_phi)) 
-                                    for deg_phi, rho in readings]
-            else:
-                rad_polar_readings = [(rho, np.deg2rad(deg_phi)) 
-                                    for rho, deg_phi in readings]
-                                    
-            rect_readings = geom.to_rect(rad_polar_readings)
-            
-            # Transform sensor reading in the vehicle reference system
-            sensor_ref = self.sensors[sensor_id].sys_ref()
-            vehicle_ref_readings = geom.to_globalpos(rect_readings, sensor_ref)
-            
-            # Transform vehicle readings into the map (external) reference
-            vehicle_ref = self.sys_ref()
-            map_readings = geom.to_globalpos(rect_readings, vehicle_ref)
-            map_scan[sensor_id] = map_readings
-            
-        return map_scan
-
-
-
-
 # Test sction ---------------------------------------------------------------
 def main():
     # Vehicle sizes (all dimensione in cm)